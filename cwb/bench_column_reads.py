@@ -0,0 +1,110 @@
+"""Benchmark full vs column-projected reads of the service-area file.
+
+Each reader runs in a fresh subprocess so peak memory (max RSS) is
+measured per read. ``--scale N`` also benchmarks a synthetic file made of
+N copies of the input features, written to a temporary directory. Readers
+that hold the whole file in memory are skipped for files larger than
+``--max-in-memory-mb``, so large scales measure the streaming readers
+without running out of RAM.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import KEEP_PROPERTIES
+from geojson_stream import FeatureWriter, iter_features
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+# Largest file the in-memory readers are run on; their peak RSS is
+# several times the file size.
+MAX_IN_MEMORY_MB = 250
+
+# (label, holds the whole file in memory, snippet). Each snippet loads
+# PATH and keeps the result alive until max RSS is read.
+READERS = [
+    ("GeoPandas, all columns", True,
+     "import geopandas as gpd; data = gpd.read_file(PATH)"),
+    ("GeoPandas, declared columns", True,
+     "import geopandas as gpd; data = gpd.read_file(PATH, columns=COLUMNS)"),
+    ("json.load, all properties", True,
+     "import json; data = json.load(open(PATH))['features']"),
+    ("json.load, declared columns", True,
+     "import json; from geojson_stream import project\n"
+     "data = [project(f, COLUMNS) for f in json.load(open(PATH))['features']]"),
+    ("ijson stream, all properties", False,
+     "from geojson_stream import iter_features\n"
+     "for data in iter_features(PATH): pass"),
+    ("ijson stream, declared columns", False,
+     "from geojson_stream import iter_features\n"
+     "for data in iter_features(PATH, COLUMNS): pass"),
+]
+
+RUNNER = """
+import resource, sys, time
+PATH, COLUMNS = sys.argv[1], sys.argv[2].split(",")
+start = time.perf_counter()
+{snippet}
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def measure(snippet, path, columns):
+    out = subprocess.run(
+        [sys.executable, "-c", RUNNER.format(snippet=snippet), path, ",".join(columns)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout.split()
+    # ru_maxrss is in kilobytes on Linux.
+    return float(out[0]), int(out[1]) / 1024
+
+
+def write_scaled(source, path, scale):
+    with FeatureWriter(path, name="scaled") as writer:
+        for copy in range(scale):
+            for feature in iter_features(source):
+                feature["properties"]["PWSID"] = f"{feature['properties']['PWSID']}-{copy}"
+                writer.write(feature)
+
+
+def benchmark(path, columns, max_in_memory_mb=MAX_IN_MEMORY_MB):
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"\n{path} ({size_mb:,.1f} MB), columns: {', '.join(columns)}")
+    print(f"{'reader':<34}{'time':>10}{'peak RSS':>12}")
+    for label, in_memory, snippet in READERS:
+        if in_memory and size_mb > max_in_memory_mb:
+            print(f"{label:<34}{'skipped (file > --max-in-memory-mb)':>22}")
+            continue
+        seconds, peak = measure(snippet, path, columns)
+        print(f"{label:<34}{seconds:>9.2f}s{peak:>10.0f}MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--columns", nargs="+", default=KEEP_PROPERTIES)
+    parser.add_argument("--scale", type=int, default=0, help="also test N copies of the input")
+    parser.add_argument(
+        "--max-in-memory-mb",
+        type=float,
+        default=MAX_IN_MEMORY_MB,
+        help="skip readers that load the whole file for inputs larger than this",
+    )
+    args = parser.parse_args(argv)
+
+    benchmark(args.input, args.columns, args.max_in_memory_mb)
+    if args.scale > 1:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"scaled_x{args.scale}.geojson")
+            print(f"\nWriting {args.scale}x synthetic copy...")
+            write_scaled(args.input, path, args.scale)
+            benchmark(path, args.columns, args.max_in_memory_mb)
+
+
+if __name__ == "__main__":
+    main()
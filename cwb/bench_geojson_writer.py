@@ -0,0 +1,86 @@
+"""Benchmark GeoJSON write time and output size for the centroid file.
+
+Compares GeoPandas' ``to_file`` with FeatureWriter at several settings,
+writing the features of mi_cwb_centroids.geojson to a temporary directory.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import KEEP_PROPERTIES
+import geojson_stream
+from geojson_stream import FeatureWriter
+
+INPUT_GEOJSON = "mi_cwb_centroids.geojson"
+REPEAT = 5
+CENTROID_PROPERTIES = KEEP_PROPERTIES + ["lon", "lat"]
+
+CASES = [
+    ("FeatureWriter, all properties", {}),
+    ("  + precision 6", {"precision": 6}),
+    ("  + allow-list", {"precision": 6, "properties": CENTROID_PROPERTIES}),
+    ("  + minify", {"precision": 6, "properties": CENTROID_PROPERTIES, "minify": True}),
+    ("  + gzip + brotli", {"precision": 6, "properties": CENTROID_PROPERTIES, "minify": True,
+                           "compress": ["gzip", "br"]}),
+]
+
+
+def best_time(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def write_features(path, features, options):
+    with FeatureWriter(path, name="bench", **options) as writer:
+        for feature in features:
+            writer.write(feature)
+
+
+def sizes(path):
+    out = [os.path.getsize(path)]
+    for suffix in (".gz", ".br"):
+        out.append(os.path.getsize(path + suffix) if os.path.exists(path + suffix) else None)
+    return out
+
+
+def report(label, seconds, raw, gz=None, br=None):
+    extra = "".join(f"{size:>10,}" if size else f"{'-':>10}" for size in (gz, br))
+    print(f"{label:<32}{seconds * 1000:>9.1f}ms{raw:>12,}{extra}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    serializer = "orjson" if geojson_stream.orjson is not None else "json"
+    print(f"{len(features)} features from {args.input}, best of {REPEAT}, serializer: {serializer}")
+    print(f"{'writer':<32}{'time':>11}{'bytes':>12}{'gzip':>10}{'brotli':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            import geopandas as gpd
+        except ImportError:
+            gpd = None
+        if gpd is not None:
+            gdf = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+            path = os.path.join(tmp, "geopandas.geojson")
+            seconds = best_time(lambda: gdf.to_file(path, driver="GeoJSON"))
+            report("GeoPandas to_file", seconds, os.path.getsize(path))
+
+        for index, (label, options) in enumerate(CASES):
+            path = os.path.join(tmp, f"case{index}.geojson")
+            seconds = best_time(lambda: write_features(path, features, options))
+            report(label, seconds, *sizes(path))
+
+if __name__ == "__main__":
+    main()
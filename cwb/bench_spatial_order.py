@@ -0,0 +1,86 @@
+"""Benchmark bbox queries on source-ordered vs Hilbert-ordered outputs.
+
+Both orders of each source are written to a temporary directory as
+GeoParquet (row groups of ``ROW_GROUP_SIZE``, bbox covering column). For
+a few query boxes it reports the bbox read time and how many row groups
+the query has to fetch. The row group count is also the number of
+fixed-size chunks a client doing range reads or culling by chunk extent
+would touch in a GeoJSON file of the same order.
+"""
+
+import argparse
+import os
+import tempfile
+
+import geopandas as gpd
+import numpy as np
+import pyarrow.parquet as pq
+
+from export_formats import BENCHMARK_REPEAT, ROW_GROUP_SIZE, SOURCES, best_time, spatial_order
+
+QUERIES = {
+    "Detroit": (-83.30, 42.25, -82.90, 42.45),
+    "Grand Rapids": (-85.80, 42.85, -85.50, 43.05),
+    "Lansing": (-84.70, 42.65, -84.40, 42.80),
+    "Marquette": (-87.60, 46.40, -87.20, 46.65),
+}
+
+
+def intersects(boxes, bbox):
+    minx, miny, maxx, maxy = bbox
+    return (
+        (boxes[:, 0] <= maxx) & (boxes[:, 1] <= maxy)
+        & (boxes[:, 2] >= minx) & (boxes[:, 3] >= miny)
+    )
+
+
+def row_groups_touched(path, bbox):
+    """Row groups whose bbox column statistics overlap ``bbox``."""
+    metadata = pq.ParquetFile(path).metadata
+    names = [metadata.schema.column(i).path for i in range(metadata.num_columns)]
+    columns = [names.index(f"bbox.{part}") for part in ("xmin", "ymin", "xmax", "ymax")]
+    boxes = np.array([
+        [
+            metadata.row_group(g).column(columns[0]).statistics.min,
+            metadata.row_group(g).column(columns[1]).statistics.min,
+            metadata.row_group(g).column(columns[2]).statistics.max,
+            metadata.row_group(g).column(columns[3]).statistics.max,
+        ]
+        for g in range(metadata.num_row_groups)
+    ])
+    return int(intersects(boxes, bbox).sum()), metadata.num_row_groups
+
+
+def benchmark(source, tmp):
+    gdf = gpd.read_file(source)
+    if gdf.crs is None:
+        gdf.set_crs(epsg=4326, inplace=True)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    ordered = {"source": gdf, "hilbert": spatial_order(gdf)}
+    paths = {}
+    for order, frame in ordered.items():
+        paths[order] = os.path.join(tmp, f"{stem}_{order}.parquet")
+        frame.to_parquet(paths[order], write_covering_bbox=True, row_group_size=ROW_GROUP_SIZE)
+
+    print(f"\n{source}: {len(gdf)} features, best of {BENCHMARK_REPEAT}")
+    print(f"{'query':<14}{'order':<9}{'rows':>6}{'bbox read':>12}{'row groups':>12}")
+    for name, bbox in QUERIES.items():
+        for order in ordered:
+            path = paths[order]
+            seconds, rows = best_time(lambda: gpd.read_parquet(path, bbox=bbox))
+            groups, total_groups = row_groups_touched(path, bbox)
+            print(f"{name:<14}{order:<9}{rows:>6}{seconds * 1000:>10.1f}ms"
+                  f"{f'{groups}/{total_groups}':>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=SOURCES)
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        for source in args.sources:
+            benchmark(source, tmp)
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Vectorized polygon centroids and bounds with NumPy, without GeoPandas or Shapely.
+
+All rings of all Polygon/MultiPolygon geometries are flattened into one
+contiguous coordinate array with offset indexes, and area-weighted
+centroids are computed with a single shoelace pass over it.
+"""
+
+from itertools import chain
+
+import numpy as np
+
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def flatten(geometries):
+    """Flatten the rings of every geometry into contiguous arrays.
+
+    Returns ``(coords, ring_offsets, ring_feature, ring_exterior)``:
+    ``coords`` is an (n, 2) float array of every vertex, ring ``i`` spans
+    ``coords[ring_offsets[i]:ring_offsets[i + 1]]``, belongs to geometry
+    ``ring_feature[i]`` and is an exterior ring when ``ring_exterior[i]``.
+    """
+    rings = []
+    ring_feature = []
+    ring_exterior = []
+    for index, geometry in enumerate(geometries):
+        for polygon in _polygons(geometry):
+            for ring_index, ring in enumerate(polygon):
+                rings.append(ring)
+                ring_feature.append(index)
+                ring_exterior.append(ring_index == 0)
+
+    lengths = np.fromiter((len(ring) for ring in rings), dtype=np.int64, count=len(rings))
+    ring_offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=ring_offsets[1:])
+
+    n = int(ring_offsets[-1])
+    flat = chain.from_iterable(chain.from_iterable(rings))
+    coords = np.fromiter(flat, dtype=np.float64, count=2 * n).reshape(n, 2)
+    return (
+        coords,
+        ring_offsets,
+        np.asarray(ring_feature, dtype=np.int64),
+        np.asarray(ring_exterior, dtype=bool),
+    )
+
+
+def centroids(geometries):
+    """Return ``(xs, ys)`` arrays of area-weighted centroids, one per geometry.
+
+    Results match Shapely's planar ``centroid``: holes are subtracted
+    regardless of ring winding order, and degenerate (zero-area)
+    geometries fall back to the mean of their vertices.
+    """
+    geometries = list(geometries)
+    count = len(geometries)
+    if count == 0:
+        return np.empty(0), np.empty(0)
+
+    coords, ring_offsets, ring_feature, ring_exterior = flatten(geometries)
+    lengths = np.diff(ring_offsets)
+    vertex_ring = np.repeat(np.arange(len(lengths)), lengths)
+    vertex_feature = ring_feature[vertex_ring]
+
+    # Work relative to each geometry's first vertex to keep precision.
+    first = np.full(count, len(coords), dtype=np.int64)
+    np.minimum.at(first, vertex_feature, np.arange(len(coords)))
+    origin = coords[first[vertex_feature]]
+    local = coords - origin
+
+    # Edge i runs from vertex i to i + 1; drop the edges that span two rings.
+    x0, y0 = local[:-1, 0], local[:-1, 1]
+    x1, y1 = local[1:, 0], local[1:, 1]
+    edge_ring = vertex_ring[:-1]
+    valid = edge_ring == vertex_ring[1:]
+    cross = np.where(valid, x0 * y1 - x1 * y0, 0.0)
+
+    rings = len(lengths)
+    ring_area = np.bincount(edge_ring, weights=cross, minlength=rings) / 2.0
+    ring_cx = np.bincount(edge_ring, weights=(x0 + x1) * cross, minlength=rings) / 6.0
+    ring_cy = np.bincount(edge_ring, weights=(y0 + y1) * cross, minlength=rings) / 6.0
+
+    # Exterior rings add area and holes remove it, whatever their winding.
+    sign = np.sign(ring_area) * np.where(ring_exterior, 1.0, -1.0)
+    area = np.bincount(ring_feature, weights=sign * ring_area, minlength=count)
+    cx = np.bincount(ring_feature, weights=sign * ring_cx, minlength=count)
+    cy = np.bincount(ring_feature, weights=sign * ring_cy, minlength=count)
+
+    origin_x = coords[first, 0]
+    origin_y = coords[first, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xs = origin_x + cx / area
+        ys = origin_y + cy / area
+
+    degenerate = ~(area > 0)
+    if degenerate.any():
+        vertices = np.bincount(vertex_feature, minlength=count)
+        mean_x = np.bincount(vertex_feature, weights=local[:, 0], minlength=count) / vertices
+        mean_y = np.bincount(vertex_feature, weights=local[:, 1], minlength=count) / vertices
+        xs[degenerate] = origin_x[degenerate] + mean_x[degenerate]
+        ys[degenerate] = origin_y[degenerate] + mean_y[degenerate]
+    return xs, ys
+
+
+def bounds(geometries):
+    """Return an (n, 4) array of ``minx, miny, maxx, maxy`` per geometry."""
+    geometries = list(geometries)
+    out = np.full((len(geometries), 4), np.nan)
+    if not geometries:
+        return out
+    coords, ring_offsets, ring_feature, _ = flatten(geometries)
+    vertex_feature = np.repeat(ring_feature, np.diff(ring_offsets))
+    out[:, :2] = np.inf
+    out[:, 2:] = -np.inf
+    np.minimum.at(out[:, 0], vertex_feature, coords[:, 0])
+    np.minimum.at(out[:, 1], vertex_feature, coords[:, 1])
+    np.maximum.at(out[:, 2], vertex_feature, coords[:, 0])
+    np.maximum.at(out[:, 3], vertex_feature, coords[:, 1])
+    return out
@@ -0,0 +1,36 @@
+"""Helpers and constants shared by the geometry pipeline scripts."""
+
+import numpy as np
+import shapely
+
+# Service-area properties carried into the derived map and data files.
+KEEP_PROPERTIES = ["PWSID", "PWS_Name", "Population_Served_Count"]
+EARTH_RADIUS_M = 6371008.8
+
+
+def repair(geometries):
+    """Fix the few invalid source polygons so GEOS operations don't fail."""
+    invalid = ~shapely.is_valid(geometries)
+    geometries = geometries.copy()
+    geometries[invalid] = shapely.make_valid(geometries[invalid])
+    return geometries, int(invalid.sum())
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """Great-circle distance in meters between arrays of points."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def batches(features, size):
+    """Group an iterable into lists of ``size`` items; the last may be shorter."""
+    batch = []
+    for feature in features:
+        batch.append(feature)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,145 @@
+"""Diff two releases of the EPA service-area file by PWSID.
+
+Both files are streamed once. Each feature's geometry is normalized
+(coordinates rounded to ``--precision`` digits, then rings, parts and
+start vertices put in GEOS canonical order) and hashed, so a release that
+only rewrites vertex order or float noise is not reported. Properties are
+compared without the fields EPA regenerates on every export
+(``IGNORED_PROPERTIES``). Systems are reported as added, removed,
+reshaped (geometry changed) or attribute-only changes; ``--output``
+writes the report as JSON with a ``rebuild`` list of the PWSIDs whose
+derived files need regenerating.
+"""
+
+import argparse
+import hashlib
+import json
+import time
+
+import numpy as np
+import shapely
+
+from common import batches
+import centroid_engine
+from geojson_stream import iter_features
+
+# About 1 cm; smaller differences are treated as float noise.
+PRECISION = 7
+# Regenerated on every export, or derived from the geometry itself.
+IGNORED_PROPERTIES = ["OBJECTID", "Shape__Area", "Shape__Length"]
+# Features hashed per vectorized batch; bounds memory on the national file.
+BATCH_SIZE = 4096
+
+
+def geometry_hashes(geometries, precision=PRECISION):
+    """Hashes of GeoJSON polygons that ignore ring direction, start vertex and part order.
+
+    The batch is flattened into one coordinate array, rounded, rebuilt as
+    MultiPolygons and normalized by GEOS, all without a per-vertex Python loop.
+    """
+    hashes = [None] * len(geometries)
+    present = [i for i, geometry in enumerate(geometries) if geometry]
+    if not present:
+        return hashes
+    coords, ring_offsets, ring_feature, ring_exterior = centroid_engine.flatten(
+        geometries[i] for i in present
+    )
+    polygon_starts = np.flatnonzero(ring_exterior)
+    polygon_offsets = np.append(polygon_starts, len(ring_exterior))
+    geometry_offsets = np.searchsorted(ring_feature[polygon_starts], np.arange(len(present) + 1))
+    multipolygons = shapely.from_ragged_array(
+        shapely.GeometryType.MULTIPOLYGON,
+        np.round(coords, precision),
+        (ring_offsets, polygon_offsets, geometry_offsets),
+    )
+    for i, wkb in zip(present, shapely.to_wkb(shapely.normalize(multipolygons))):
+        hashes[i] = hashlib.blake2b(wkb, digest_size=16).hexdigest()
+    return hashes
+
+
+def release_index(path, precision=PRECISION):
+    """Map PWSID to ``(geometry hash, compared properties)`` for one release."""
+    hashes = {}
+    index = {}
+    for batch in batches(iter_features(path), BATCH_SIZE):
+        geometry_hash = geometry_hashes([feature["geometry"] for feature in batch], precision)
+        for feature, h in zip(batch, geometry_hash):
+            properties = {
+                key: value for key, value in feature["properties"].items()
+                if key not in IGNORED_PROPERTIES
+            }
+            pwsid = properties.get("PWSID")
+            hashes.setdefault(pwsid, []).append(h or "")
+            # Parts of a split system share their attributes; the first one wins.
+            index.setdefault(pwsid, properties)
+    duplicates = sum(len(parts) - 1 for parts in hashes.values())
+    # Parts are combined independently of their order in the file.
+    index = {pwsid: ("+".join(sorted(parts)), index[pwsid]) for pwsid, parts in hashes.items()}
+    return index, duplicates
+
+
+def diff_releases(old, new):
+    """Compare two ``release_index`` results."""
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    reshaped = []
+    attributes = {}
+    for pwsid in sorted(set(old) & set(new)):
+        old_hash, old_properties = old[pwsid]
+        new_hash, new_properties = new[pwsid]
+        if old_hash != new_hash:
+            reshaped.append(pwsid)
+        changed = sorted(
+            key for key in set(old_properties) | set(new_properties)
+            if old_properties.get(key) != new_properties.get(key)
+        )
+        if changed and old_hash == new_hash:
+            attributes[pwsid] = changed
+    return {
+        "added": added,
+        "removed": removed,
+        "reshaped": reshaped,
+        "attributes": attributes,
+        "rebuild": sorted(set(added) | set(reshaped) | set(attributes)),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two service-area releases by PWSID.")
+    parser.add_argument("old", help="previous release GeoJSON")
+    parser.add_argument("new", help="new release GeoJSON")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument(
+        "--precision",
+        type=int,
+        default=PRECISION,
+        help="decimal places compared; smaller coordinate changes are ignored",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    old, old_duplicates = release_index(args.old, args.precision)
+    new, new_duplicates = release_index(args.new, args.precision)
+    report = diff_releases(old, new)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.old}: {len(old)} systems; {args.new}: {len(new)} systems")
+    if old_duplicates or new_duplicates:
+        print(f"Merged {old_duplicates} / {new_duplicates} repeated PWSIDs")
+    print(f"Added:           {len(report['added'])}")
+    print(f"Removed:         {len(report['removed'])}")
+    print(f"Reshaped:        {len(report['reshaped'])}")
+    print(f"Attribute only:  {len(report['attributes'])}")
+    print(f"To rebuild:      {len(report['rebuild'])} (diffed in {elapsed:.2f}s)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.output}")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
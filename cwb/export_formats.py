@@ -0,0 +1,115 @@
+"""Write the service areas and centroids as GeoParquet and FlatGeobuf.
+
+Invalid geometries are repaired first. GeoParquet files get a bbox
+covering column, so readers can skip row groups outside a query box.
+FlatGeobuf files carry their packed Hilbert R-tree, so bbox reads fetch
+only the features they need. Pass
+``--benchmark`` to time full and bbox loads against the GeoJSON sources.
+"""
+
+import argparse
+import os
+import time
+
+import geopandas as gpd
+
+from common import repair
+from hilbert import add_order_argument, hilbert_order
+
+SOURCES = ["mi_cwb.geojson", "mi_cwb_centroids.geojson"]
+# Detroit and its inner suburbs.
+BENCHMARK_BBOX = (-83.30, 42.25, -82.90, 42.45)
+BENCHMARK_REPEAT = 3
+# Small row groups let bbox reads skip most of a spatially ordered file.
+ROW_GROUP_SIZE = 64
+
+
+def output_paths(source):
+    stem = os.path.splitext(source)[0]
+    return stem + ".parquet", stem + ".fgb"
+
+
+def spatial_order(gdf):
+    """Rows of ``gdf`` sorted along a Hilbert curve of their centroids."""
+    centroids = gdf.geometry.centroid
+    return gdf.iloc[hilbert_order(centroids.x, centroids.y)].reset_index(drop=True)
+
+
+def export(source, order="hilbert"):
+    gdf = gpd.read_file(source)
+    if gdf.crs is None:
+        gdf.set_crs(epsg=4326, inplace=True)
+    # Readers such as service_area_lookup.py rely on repaired geometry.
+    geometries, _ = repair(gdf.geometry.to_numpy())
+    gdf = gdf.set_geometry(gpd.GeoSeries(geometries, index=gdf.index, crs=gdf.crs))
+    if order == "hilbert":
+        gdf = spatial_order(gdf)
+    parquet_path, fgb_path = output_paths(source)
+    gdf.to_parquet(parquet_path, write_covering_bbox=True, row_group_size=ROW_GROUP_SIZE)
+    gdf.to_file(fgb_path, driver="FlatGeobuf", SPATIAL_INDEX="YES")
+    return len(gdf), parquet_path, fgb_path
+
+
+def best_time(fn):
+    best = float("inf")
+    for _ in range(BENCHMARK_REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, len(result)
+
+
+def benchmark(source, bbox):
+    parquet_path, fgb_path = output_paths(source)
+    readers = [
+        ("GeoJSON", source,
+         lambda: gpd.read_file(source),
+         lambda: gpd.read_file(source, bbox=bbox)),
+        ("GeoParquet", parquet_path,
+         lambda: gpd.read_parquet(parquet_path),
+         lambda: gpd.read_parquet(parquet_path, bbox=bbox)),
+        ("FlatGeobuf", fgb_path,
+         lambda: gpd.read_file(fgb_path),
+         lambda: gpd.read_file(fgb_path, bbox=bbox)),
+    ]
+    print(f"\n{source} (best of {BENCHMARK_REPEAT})")
+    print(f"{'format':<12}{'bytes':>14}{'full load':>12}{'bbox load':>12}{'bbox rows':>11}")
+    for name, path, full, clipped in readers:
+        full_time, _ = best_time(full)
+        bbox_time, rows = best_time(clipped)
+        print(f"{name:<12}{os.path.getsize(path):>14,}{full_time * 1000:>10.1f}ms"
+              f"{bbox_time * 1000:>10.1f}ms{rows:>11}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export GeoParquet and FlatGeobuf copies.")
+    parser.add_argument("sources", nargs="*", default=SOURCES)
+    add_order_argument(parser)
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="time full and bbox loads of each format after exporting",
+    )
+    parser.add_argument(
+        "--bbox",
+        type=float,
+        nargs=4,
+        default=BENCHMARK_BBOX,
+        metavar=("MINX", "MINY", "MAXX", "MAXY"),
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for source in args.sources:
+        print(f"Exporting {source}...")
+        count, parquet_path, fgb_path = export(source, args.order)
+        print(f"  {count} features -> {parquet_path}, {fgb_path}")
+    if args.benchmark:
+        for source in args.sources:
+            benchmark(source, tuple(args.bbox))
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Content-hash cache of per-feature results for incremental pipeline runs."""
+
+import hashlib
+import json
+import math
+import os
+from array import array
+from itertools import chain
+
+
+def file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _hash_coordinates(h, coordinates):
+    # Nested lists down to [x, y] pairs; hash structure and packed doubles
+    # instead of formatting every float through json.dumps.
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        h.update(array("d", coordinates).tobytes())
+        return
+    h.update(len(coordinates).to_bytes(4, "little"))
+    if coordinates and coordinates[0] and isinstance(coordinates[0][0], (int, float)):
+        h.update(array("d", chain.from_iterable(coordinates)).tobytes())
+        return
+    for part in coordinates:
+        _hash_coordinates(h, part)
+
+
+def geometry_hash(geometry):
+    h = hashlib.blake2b(digest_size=16)
+    if geometry is not None:
+        h.update(geometry["type"].encode("utf-8"))
+        _hash_coordinates(h, geometry["coordinates"])
+    return h
+
+
+def feature_key(feature):
+    """Hash a feature's geometry and properties, independent of key order."""
+    h = geometry_hash(feature["geometry"])
+    properties = json.dumps(feature["properties"], sort_keys=True, separators=(",", ":"))
+    h.update(properties.encode("utf-8"))
+    return h.hexdigest()
+
+
+def is_point(value):
+    """True for an ``[x, y]`` pair of finite numbers, the cached centroid and label format."""
+    return (
+        isinstance(value, list) and len(value) == 2
+        and all(isinstance(c, (int, float)) and not isinstance(c, bool) and math.isfinite(c) for c in value)
+    )
+
+
+class FeatureCache:
+    """JSON file mapping feature hashes to computed results.
+
+    ``fingerprint`` describes how results were computed (for example the
+    centroid engine); a cache written with a different fingerprint is
+    ignored, as is an unreadable file. Entries rejected by ``validate``
+    count as misses and are recomputed. Entries not looked up or stored
+    during a run are dropped on ``save()``, so removed features do not
+    accumulate.
+    """
+
+    def __init__(self, path, fingerprint, validate=None):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.validate = validate
+        self.input_digest = None
+        self.hits = 0
+        self.misses = 0
+        self._old = {}
+        self._new = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("entries"), dict):
+            return
+        if data.get("fingerprint") == fingerprint:
+            self.input_digest = data.get("input_digest")
+            self._old = data.get("entries", {})
+
+    def get(self, key):
+        value = self._old.get(key)
+        if value is not None and self.validate is not None and not self.validate(value):
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._new[key] = value
+        return value
+
+    def put(self, key, value):
+        self._new[key] = value
+
+    def save(self, input_digest):
+        data = {
+            "fingerprint": self.fingerprint,
+            "input_digest": input_digest,
+            "entries": self._new,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,131 @@
+"""Read and write GeoJSON FeatureCollections one feature at a time."""
+
+import gzip
+import json
+
+import ijson
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CRS84 = {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}}
+COMPRESSIONS = ["gzip", "br"]
+
+
+def project(feature, properties):
+    """Keep only the ``properties`` allow-list on ``feature``, in place."""
+    props = feature.get("properties") or {}
+    feature["properties"] = {key: props[key] for key in properties if key in props}
+    return feature
+
+
+def iter_features(path, properties=None):
+    """Yield the features of a FeatureCollection without loading the whole file.
+
+    With ``properties`` set, every other property is dropped as soon as its
+    feature is parsed, so only the declared columns outlive the parser.
+    """
+    with open(path, "rb") as f:
+        for feature in ijson.items(f, "features.item", use_float=True):
+            yield feature if properties is None else project(feature, properties)
+
+
+def round_coordinates(coordinates, digits):
+    """Round nested GeoJSON coordinates to ``digits`` decimal places."""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(c, digits) for c in coordinates]
+    return [round_coordinates(part, digits) for part in coordinates]
+
+
+def dumps(obj, minify=False):
+    """Serialize to UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    if minify:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+class _BrotliFile:
+    def __init__(self, path):
+        try:
+            import brotli
+        except ImportError:
+            raise SystemExit("Brotli output needs the brotli package: pip install brotli")
+        self._f = open(path, "wb")
+        self._compressor = brotli.Compressor(quality=11)
+
+    def write(self, data):
+        self._f.write(self._compressor.process(data))
+
+    def close(self):
+        self._f.write(self._compressor.finish())
+        self._f.close()
+
+
+def _open_sink(path, compression):
+    if compression == "gzip":
+        return gzip.GzipFile(path + ".gz", "wb", compresslevel=9, mtime=0)
+    if compression == "br":
+        return _BrotliFile(path + ".br")
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+class FeatureWriter:
+    """Write features to a FeatureCollection as they are produced.
+
+    With ``precision`` set, geometry coordinates are rounded to that many
+    decimal places on the way out. ``properties`` is an allow-list of
+    property names to keep (default: all). ``minify`` drops the line
+    breaks between features, and each name in ``compress`` ("gzip", "br")
+    writes a precompressed copy (``.gz``/``.br``) alongside in the same pass.
+    """
+
+    def __init__(self, path, name=None, precision=None, properties=None, minify=False,
+                 compress=()):
+        self.path = path
+        self.name = name
+        self.precision = precision
+        self.properties = properties
+        self.minify = minify
+        self.compress = compress
+        self.count = 0
+        self._sinks = []
+
+    def _write(self, data):
+        for sink in self._sinks:
+            sink.write(data)
+
+    def __enter__(self):
+        self._sinks = [open(self.path, "wb")]
+        self._sinks += [_open_sink(self.path, compression) for compression in self.compress]
+        newline = b"" if self.minify else b"\n"
+        header = b'{"type":"FeatureCollection",' if self.minify else b'{\n"type": "FeatureCollection",\n'
+        if self.name:
+            header += b'"name":' + dumps(self.name) + b"," + newline
+        header += b'"crs":' + dumps(CRS84) + b"," + newline
+        header += b'"features":[' + newline
+        self._write(header)
+        return self
+
+    def write(self, feature):
+        geometry = feature.get("geometry")
+        if self.precision is not None and geometry is not None:
+            geometry = dict(geometry)
+            geometry["coordinates"] = round_coordinates(geometry["coordinates"], self.precision)
+            feature = dict(feature, geometry=geometry)
+        if self.properties is not None:
+            feature = project(dict(feature), self.properties)
+        data = dumps(feature, self.minify)
+        if self.count:
+            data = (b"," if self.minify else b",\n") + data
+        self._write(data)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._write(b"]}" if self.minify else b"\n]\n}\n")
+        for sink in self._sinks:
+            sink.close()
+        return False
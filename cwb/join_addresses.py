@@ -0,0 +1,140 @@
+"""Join a CSV of coordinates to the water system that serves each row.
+
+The input is streamed in chunks, so memory stays bounded however large
+the file is. Each chunk is assigned to service areas with one STRtree
+query and written back out with the system's lead-line counts and
+compliance status appended.
+
+    python join_addresses.py schools.csv schools_pwsid.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+from itertools import islice
+
+from lead_data import LEAD_DATA_CSV
+from service_area_lookup import INPUT_GEOJSON, INPUT_PARQUET, ServiceAreaIndex
+
+CHUNK_SIZE = 50000
+LAT_COLUMNS = ["Latitude", "latitude", "lat", "LAT", "y"]
+LON_COLUMNS = ["Longitude", "longitude", "lon", "lng", "LON", "x"]
+LEAD_FIELDS = ["status", "leadLines", "gpcl", "unknown", "totalToReplace",
+               "totalReplaced", "percentReplaced", "exceedance"]
+# Every appended column is prefixed so it cannot shadow an input column;
+# an input that already has one of these names is rejected.
+OUTPUT_PREFIX = "served_"
+OUTPUT_FIELDS = [f"{OUTPUT_PREFIX}{field}" for field in ["pwsid", "pws_name"] + LEAD_FIELDS]
+
+
+def pick_column(fieldnames, requested, candidates, label):
+    if requested:
+        if requested not in fieldnames:
+            raise SystemExit(f"Column {requested!r} not found in input")
+        return requested
+    for name in candidates:
+        if name in fieldnames:
+            return name
+    raise SystemExit(f"No {label} column found; pass --{label}-column")
+
+
+def parse_coordinate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def join_chunk(index, rows, lat_column, lon_column):
+    lats = [parse_coordinate(row[lat_column]) for row in rows]
+    lons = [parse_coordinate(row[lon_column]) for row in rows]
+    matched = 0
+    for row, result in zip(rows, index.lookup(lats, lons)):
+        lead = result["lead"] or {}
+        row["served_pwsid"] = result["pwsid"] or ""
+        row["served_pws_name"] = result["pwsName"] or ""
+        for field in LEAD_FIELDS:
+            row[f"{OUTPUT_PREFIX}{field}"] = lead.get(field, "")
+        matched += result["pwsid"] is not None
+    return matched
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Assign CSV rows to water systems.")
+    parser.add_argument("input", help="CSV with latitude/longitude columns ('-' for stdin)")
+    parser.add_argument("output", help="enriched CSV ('-' for stdout)")
+    parser.add_argument("--lat-column")
+    parser.add_argument("--lon-column")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument(
+        "--boundaries",
+        help=f"service areas (default: {INPUT_PARQUET} if up to date, else {INPUT_GEOJSON})",
+    )
+    parser.add_argument("--lead-data", default=LEAD_DATA_CSV)
+    return parser.parse_args(argv)
+
+
+def open_csv(path, mode):
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def input_columns(reader, args):
+    """Validate the input header; return the latitude and longitude column names."""
+    if not reader.fieldnames:
+        raise SystemExit(f"Input {args.input!r} is empty or has no header row")
+    collisions = [f for f in OUTPUT_FIELDS if f in reader.fieldnames]
+    if collisions:
+        raise SystemExit(f"Input already has output column(s): {', '.join(collisions)}")
+    lat_column = pick_column(reader.fieldnames, args.lat_column, LAT_COLUMNS, "lat")
+    lon_column = pick_column(reader.fieldnames, args.lon_column, LON_COLUMNS, "lon")
+    return lat_column, lon_column
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = sys.stderr if args.output == "-" else sys.stdout
+
+    src = open_csv(args.input, "r")
+    dst = None
+    try:
+        # Check the header before indexing or touching the output, so a
+        # bad input fails fast and never truncates an existing file.
+        reader = csv.DictReader(src)
+        lat_column, lon_column = input_columns(reader, args)
+
+        start = time.perf_counter()
+        index = ServiceAreaIndex.from_files(args.boundaries, args.lead_data)
+        print(f"Indexed {len(index.pwsids)} service areas in {time.perf_counter() - start:.2f}s",
+              file=log)
+
+        dst = open_csv(args.output, "w")
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames + OUTPUT_FIELDS)
+        writer.writeheader()
+
+        total = matched = 0
+        start = time.perf_counter()
+        while True:
+            rows = list(islice(reader, args.chunk_size))
+            if not rows:
+                break
+            matched += join_chunk(index, rows, lat_column, lon_column)
+            writer.writerows(rows)
+            total += len(rows)
+            elapsed = time.perf_counter() - start
+            print(f"  {total:,} rows, {total / elapsed:,.0f} rows/s", file=log)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not None and dst is not sys.stdout:
+            dst.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0
+    print(f"Joined {matched:,} of {total:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)", file=log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Compute label points (poles of inaccessibility) for the service areas.
+
+Area centroids often fall outside concave or multi-part service areas
+(lakeshore townships, split systems). This stage finds, for the largest
+part of each service area, the interior point farthest from its outline
+with the polylabel grid search, bounded by a precision and a per-feature
+time budget. Features are spread over a process pool and the points are
+written next to the centroids.
+"""
+
+import argparse
+import heapq
+import math
+import os
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from common import KEEP_PROPERTIES
+from feature_cache import FeatureCache, feature_key, file_digest, is_point
+from geojson_stream import FeatureWriter, iter_features
+from hilbert import add_order_argument, hilbert_sort
+from parallel import default_workers, imap_ordered
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+OUTPUT_GEOJSON = "mi_cwb_labels.geojson"
+# Degrees; about 50 m north-south.
+TOLERANCE = 0.0005
+# Seconds of search per feature before the best point so far is returned.
+TIME_BUDGET = 0.05
+CHUNK_SIZE = 32
+
+
+def signed_distance(polygon, boundary, xs, ys):
+    """Distance from each point to the outline; negative outside the polygon."""
+    points = shapely.points(xs, ys)
+    distance = shapely.distance(boundary, points)
+    inside = shapely.contains_xy(polygon, xs, ys)
+    return np.where(inside, distance, -distance)
+
+
+def polylabel(polygon, tolerance=TOLERANCE, time_budget=TIME_BUDGET):
+    """Return ``(x, y, distance)`` of the pole of inaccessibility of ``polygon``."""
+    minx, miny, maxx, maxy = polygon.bounds
+    cell = min(maxx - minx, maxy - miny)
+    if cell == 0:
+        return minx, miny, 0.0
+
+    boundary = polygon.boundary
+    shapely.prepare(polygon)
+    shapely.prepare(boundary)
+    deadline = time.perf_counter() + time_budget
+
+    def cells(xs, ys, h):
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        ds = signed_distance(polygon, boundary, xs, ys)
+        return [(-(d + h * math.sqrt(2)), x, y, h, d) for x, y, d in zip(xs, ys, ds)]
+
+    h = cell / 2
+    gx, gy = np.meshgrid(np.arange(minx, maxx, cell) + h, np.arange(miny, maxy, cell) + h)
+    queue = cells(gx.ravel(), gy.ravel(), h)
+    heapq.heapify(queue)
+
+    point = polygon.centroid
+    best = cells([point.x], [point.y], 0)[0]
+    box_center = cells([(minx + maxx) / 2], [(miny + maxy) / 2], 0)[0]
+    if box_center[4] > best[4]:
+        best = box_center
+
+    while queue and time.perf_counter() < deadline:
+        neg_max, x, y, h, d = heapq.heappop(queue)
+        if d > best[4]:
+            best = (neg_max, x, y, h, d)
+        if -neg_max - best[4] <= tolerance:
+            continue
+        h /= 2
+        for child in cells([x - h, x + h, x - h, x + h], [y - h, y - h, y + h, y + h], h):
+            heapq.heappush(queue, child)
+    return best[1], best[2], best[4]
+
+
+def largest_part(geometry):
+    if geometry.geom_type == "MultiPolygon":
+        return max(geometry.geoms, key=lambda part: part.area)
+    return geometry
+
+
+def label_points(task):
+    """Worker entry point: label points for a chunk of GeoJSON geometries."""
+    geometries, tolerance, time_budget = task
+    out = []
+    for geometry in geometries:
+        polygon = shapely.make_valid(shape(geometry))
+        x, y, _ = polylabel(largest_part(polygon), tolerance, time_budget)
+        out.append((float(x), float(y)))
+    return out
+
+
+def chunks(features, size, cache, tolerance, time_budget):
+    chunk = []
+    for feature in features:
+        chunk.append(feature)
+        if len(chunk) == size:
+            yield make_task(chunk, cache, tolerance, time_budget)
+            chunk = []
+    if chunk:
+        yield make_task(chunk, cache, tolerance, time_budget)
+
+
+def make_task(chunk, cache, tolerance, time_budget):
+    keys = [feature_key(f) for f in chunk] if cache else [None] * len(chunk)
+    known = [cache.get(key) for key in keys] if cache else [None] * len(chunk)
+    missing = [f["geometry"] for f, point in zip(chunk, known) if point is None]
+    context = ([f["properties"] for f in chunk], keys, known)
+    return context, (missing, tolerance, time_budget)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute service area label points.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--output", default=OUTPUT_GEOJSON)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="stop refining once within this many degrees of the optimum")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET,
+                        help="seconds of search per feature")
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = one per CPU)")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse label points of unchanged features")
+    add_order_argument(parser)
+    args = parser.parse_args(argv)
+    if args.workers == 0:
+        args.workers = default_workers()
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = None
+    if args.cache:
+        digest = f"{file_digest(args.input)}:{args.tolerance}:{args.time_budget}:{args.order}"
+        cache_path = os.path.splitext(args.output)[0] + ".cache.json"
+        # Every option that changes a point: a shorter time budget stops
+        # the search earlier, so its points must not be reused.
+        fingerprint = f"polylabel:{args.tolerance}:{args.time_budget}"
+        cache = FeatureCache(cache_path, fingerprint, validate=is_point)
+        if cache.input_digest == digest and os.path.exists(args.output):
+            print(f"{args.input} unchanged since last run; keeping {args.output}")
+            return
+
+    print(f"Computing label points for {args.input} with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    tasks = chunks(iter_features(args.input), CHUNK_SIZE, cache, args.tolerance, args.time_budget)
+    name = os.path.splitext(os.path.basename(args.output))[0]
+    labels = []
+    with FeatureWriter(args.output, name=name) as writer:
+        for (properties, keys, known), computed in imap_ordered(label_points, tasks, args.workers):
+            computed = iter(computed)
+            for props, key, point in zip(properties, keys, known):
+                if point is None:
+                    point = next(computed)
+                    if cache is not None:
+                        cache.put(key, point)
+                x, y = point
+                out = {k: props.get(k) for k in KEEP_PROPERTIES}
+                out["lon"], out["lat"] = x, y
+                labels.append({
+                    "type": "Feature",
+                    "properties": out,
+                    "geometry": {"type": "Point", "coordinates": [x, y]},
+                })
+        if args.order == "hilbert":
+            labels = hilbert_sort(labels, [f["properties"]["lon"] for f in labels],
+                                  [f["properties"]["lat"] for f in labels])
+        for label in labels:
+            writer.write(label)
+    print(f"Wrote {writer.count} label points to {args.output} "
+          f"in {time.perf_counter() - start:.2f}s")
+    if cache is not None:
+        print(f"Cache: {cache.hits} reused, {cache.misses} computed")
+        cache.save(digest)
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
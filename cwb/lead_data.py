@@ -0,0 +1,72 @@
+"""Load lead-data.csv the same way scripts/convertCsv.js does.
+
+Records use the dashboard's field names (``pwsid``, ``leadLines``,
+``percentReplaced``, ``status`` ...) so files joined here line up with
+``src/data/waterSystemsData.js``.
+"""
+
+import csv
+import os
+
+LEAD_DATA_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lead-data.csv")
+
+
+def clean(value):
+    if not value or value.strip() == "-":
+        return 0
+    try:
+        number = float(value.replace(",", "").replace('"', "").replace("%", "").strip())
+    except ValueError:
+        return 0
+    return int(number) if number.is_integer() else number
+
+
+def clean_string(value):
+    if not value or value.strip() == "-":
+        return ""
+    return value.strip()
+
+
+def parse_row(row):
+    lead_lines = clean(row.get("Lead Lines"))
+    gpcl = clean(row.get("GPCL"))
+    unknown = clean(row.get("Unknown"))
+    total_to_replace = clean(row.get("Total To Replace")) or (lead_lines + gpcl + unknown)
+    total_replaced = clean(row.get("Total Replaced"))
+    status = clean_string(row.get("Status")) or "Unknown"
+
+    if status == "100% replaced":
+        percent_replaced = 100
+    elif total_to_replace > 0 or total_replaced > 0:
+        percent_replaced = min(100, total_replaced / (total_to_replace + total_replaced) * 100)
+    else:
+        percent_replaced = 0
+
+    return {
+        "pwsid": clean_string(row.get("PWSID")),
+        "name": clean_string(row.get("Supply Name")),
+        "population": clean(row.get("Population")),
+        "leadLines": lead_lines,
+        "gpcl": gpcl,
+        "unknown": unknown,
+        "totalToReplace": total_to_replace,
+        "totalReplaced": total_replaced,
+        "percentReplaced": percent_replaced,
+        "exceedance": clean_string(row.get("Exceedance")),
+        "latitude": clean(row.get("Latitude")) or None,
+        "longitude": clean(row.get("Longitude")) or None,
+        "status": status,
+    }
+
+
+def load_lead_data(path=LEAD_DATA_CSV):
+    """Return a dict of parsed lead-data.csv records keyed by PWSID."""
+    records = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        for row in reader:
+            record = parse_row(row)
+            if record["pwsid"]:
+                records[record["pwsid"]] = record
+    return records
@@ -0,0 +1,119 @@
+"""Build the neighbour graph of the service areas as a CSR adjacency file.
+
+Two systems are neighbours when their service areas touch, overlap or
+come within ``--distance`` meters of each other. Candidate pairs come
+from one vectorized STRtree ``dwithin`` query, so no pair of polygons is
+compared unless their extents are close. The graph is written as
+compressed sparse rows keyed by PWSID:
+
+    ids      PWSID per node, in Hilbert order
+    indptr   node i's neighbours are indices[indptr[i]:indptr[i + 1]]
+    indices  neighbour node positions, ascending per node
+    gaps     gap in meters to each neighbour (0 = touching or overlapping)
+"""
+
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from common import repair
+from geojson_stream import dumps, iter_features
+from hilbert import hilbert_sort
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+OUTPUT_GRAPH = "mi_cwb_adjacency.json"
+DISTANCE_M = 100.0
+METERS_PER_DEGREE = 111320.0
+
+
+def build_graph(features, distance_m=DISTANCE_M):
+    """Return the CSR graph dict for ``features``."""
+    geometries, _ = repair(
+        np.array([shape(feature["geometry"]) for feature in features], dtype=object)
+    )
+    ids = [feature["properties"].get("PWSID") for feature in features]
+    # A longitude degree is shortest at the northern edge; size the search for it
+    # and measure the real gap per pair below.
+    north = shapely.total_bounds(geometries)[3]
+    degrees = distance_m / (METERS_PER_DEGREE * math.cos(math.radians(north)))
+    tree = shapely.STRtree(geometries)
+    left, right = tree.query(geometries, predicate="dwithin", distance=degrees)
+    # Each pair once; the graph is mirrored below.
+    keep = left < right
+    left, right = left[keep], right[keep]
+
+    # Gap in meters, with longitude scaled at each pair's latitude.
+    line = shapely.shortest_line(geometries[left], geometries[right])
+    ends = shapely.get_coordinates(line).reshape(-1, 2, 2)
+    scale = np.cos(np.radians(ends[:, :, 1].mean(axis=1)))
+    dx = (ends[:, 1, 0] - ends[:, 0, 0]) * scale
+    dy = ends[:, 1, 1] - ends[:, 0, 1]
+    gaps = np.hypot(dx, dy) * METERS_PER_DEGREE
+    close = gaps <= distance_m
+    left, right, gaps = left[close], right[close], gaps[close]
+    left, right = np.concatenate([left, right]), np.concatenate([right, left])
+    gaps = np.concatenate([gaps, gaps])
+
+    order = np.lexsort((right, left))
+    left, right, gaps = left[order], right[order], gaps[order]
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(left, minlength=len(ids)), out=indptr[1:])
+    return {
+        "version": 1,
+        "distance": distance_m,
+        "ids": ids,
+        "indptr": indptr.tolist(),
+        "indices": right.tolist(),
+        "gaps": np.round(gaps).astype(np.int64).tolist(),
+    }
+
+
+def neighbors(graph, pwsid):
+    """Return ``[(pwsid, gap in meters), ...]`` for one system."""
+    i = graph["ids"].index(pwsid)
+    start, end = graph["indptr"][i], graph["indptr"][i + 1]
+    return [
+        (graph["ids"][j], gap)
+        for j, gap in zip(graph["indices"][start:end], graph["gaps"][start:end])
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the service-area adjacency graph.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--output", default=OUTPUT_GRAPH)
+    parser.add_argument(
+        "--distance",
+        type=float,
+        default=DISTANCE_M,
+        help="meters between two service areas that still makes them neighbours",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Loading polygons from {args.input}...")
+    features = hilbert_sort(list(iter_features(args.input, ["PWSID"])))
+    print("Read", len(features), "features")
+
+    start = time.perf_counter()
+    graph = build_graph(features, args.distance)
+    elapsed = time.perf_counter() - start
+    with open(args.output, "wb") as f:
+        f.write(dumps(graph, minify=True))
+
+    degree = np.diff(graph["indptr"])
+    print(f"{len(graph['indices']) // 2:,} neighbour pairs within {args.distance:g} m "
+          f"in {elapsed:.2f}s; {int((degree == 0).sum())} systems have none, "
+          f"max degree {int(degree.max())}")
+    print(f"Wrote {os.path.getsize(args.output):,} bytes to {args.output}")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,38 @@
-import geopandas as gpd
+import argparse
+import json
+import math
+import os
+
+from common import KEEP_PROPERTIES, batches
+from feature_cache import FeatureCache, feature_key, file_digest, is_point
+from geojson_stream import COMPRESSIONS, FeatureWriter, iter_features, project
+from hilbert import ORDER_HELP, add_order_argument, hilbert_order, hilbert_sort
+from parallel import default_workers, imap_ordered
 
 INPUT_GEOJSON = "mi_cwb.geojson"
 OUTPUT_GEOJSON = "mi_cwb_centroids.geojson"
 
-def main():
-    print("Starting script...")
-    print(f"Loading polygons from {INPUT_GEOJSON}...")
-    gdf = gpd.read_file(INPUT_GEOJSON)
+# Features per centroid batch in --stream mode; bounds memory use.
+STREAM_BATCH_SIZE = 64
+
+
+def point_feature(properties, x, y):
+    """Build the output point feature for a service area centroid."""
+    properties = dict(properties)
+    properties["lon"] = x
+    properties["lat"] = y
+    return {
+        "type": "Feature",
+        "properties": properties,
+        "geometry": {"type": "Point", "coordinates": [x, y]},
+    }
+
+
+def run_geopandas(input_path, output_path, columns=None, order="source"):
+    import geopandas as gpd
+
+    print(f"Loading polygons from {input_path}...")
+    gdf = gpd.read_file(input_path, columns=columns)
     print("Read", len(gdf), "features")
 
     if gdf.crs is None:
@@ -24,12 +50,221 @@ def main():
     print("Adding lon/lat fields...")
     gdf_points["lon"] = gdf_points.geometry.x
     gdf_points["lat"] = gdf_points.geometry.y
+    if order == "hilbert":
+        gdf_points = gdf_points.iloc[hilbert_order(gdf_points["lon"], gdf_points["lat"])]
+
+    print(f"Saving centroid points to {output_path}...")
+    gdf_points.to_file(output_path, driver="GeoJSON")
+
+
+def shapely_centroids(geometries):
+    from shapely.geometry import shape
+
+    centroids = (shape(geometry).centroid for geometry in geometries)
+    return [(c.x, c.y) for c in centroids]
+
+
+def numpy_centroids(geometries):
+    import centroid_engine
+
+    xs, ys = centroid_engine.centroids(geometries)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def centroid_task(batch, cache):
+    """Split a batch into the context kept locally and the geometries to compute."""
+    properties = [f["properties"] for f in batch]
+    if cache is None:
+        return (properties, None, None), [f["geometry"] for f in batch]
+    keys = [feature_key(f) for f in batch]
+    known = [cache.get(key) for key in keys]
+    missing = [f["geometry"] for f, point in zip(batch, known) if point is None]
+    return (properties, keys, known), missing
+
+
+def write_centroids(features, output_path, centroid_fn, batch_size, workers=1, cache=None,
+                    writer_options=None, order="source"):
+    """Compute and write one centroid point per feature.
+
+    With ``order="hilbert"`` the point features are held back and written
+    along a Hilbert curve once every centroid is known. The input is still
+    read in batches, but memory grows with the output, so ``--stream``
+    defaults to source order.
+    """
+    writer_options = writer_options or {}
+    precision = writer_options.get("precision")
+    tasks = (centroid_task(batch, cache) for batch in batches(features, batch_size))
+    name = os.path.splitext(os.path.basename(output_path))[0]
+    held = [] if order == "hilbert" else None
+    with FeatureWriter(output_path, name=name, **writer_options) as writer:
+        for (properties, keys, known), computed in imap_ordered(centroid_fn, tasks, workers):
+            if cache is not None:
+                computed = iter(computed)
+                points = []
+                for key, point in zip(keys, known):
+                    if point is None:
+                        point = next(computed)
+                        cache.put(key, point)
+                    points.append(point)
+            else:
+                points = computed
+            for props, (x, y) in zip(properties, points):
+                if precision is not None:
+                    x, y = round(x, precision), round(y, precision)
+                if held is None:
+                    writer.write(point_feature(props, x, y))
+                else:
+                    held.append(point_feature(props, x, y))
+        if held:
+            xs = [feature["properties"]["lon"] for feature in held]
+            ys = [feature["properties"]["lat"] for feature in held]
+            for feature in hilbert_sort(held, xs, ys):
+                writer.write(feature)
+    print("Wrote", writer.count, "features")
 
-    print(f"Saving centroid points to {OUTPUT_GEOJSON}...")
-    gdf_points.to_file(OUTPUT_GEOJSON, driver="GeoJSON")
+
+def run_streaming(input_path, output_path, centroid_fn, workers=1, cache=None,
+                  writer_options=None, columns=None, order="source"):
+    print(f"Streaming polygons from {input_path} to {output_path}...")
+    features = iter_features(input_path, columns)
+    write_centroids(features, output_path, centroid_fn, STREAM_BATCH_SIZE, workers, cache,
+                    writer_options, order)
+
+
+def run_in_memory(input_path, output_path, centroid_fn, workers=1, cache=None,
+                  writer_options=None, columns=None, order="source"):
+    print(f"Loading polygons from {input_path}...")
+    with open(input_path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    if columns is not None:
+        # json.load and a projection beat building the list with ijson,
+        # which parses every property in Python before dropping it.
+        features = [project(feature, columns) for feature in features]
+    print("Read", len(features), "features")
+
+    # One vectorized pass per worker.
+    batch_size = max(1, math.ceil(len(features) / workers))
+    print(f"Computing centroids and saving to {output_path}...")
+    write_centroids(features, output_path, centroid_fn, batch_size, workers, cache,
+                    writer_options, order)
+
+
+def cache_path_for(output_path):
+    return os.path.splitext(output_path)[0] + ".cache.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute service area centroids.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--output", default=OUTPUT_GEOJSON)
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read and write one feature at a time so memory stays flat",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["geopandas", "numpy"],
+        default="geopandas",
+        help="centroid backend; numpy skips the GeoPandas/Shapely stack",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes to spread centroid chunks over (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse centroids of unchanged features from the cache next to --output",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        help="decimal places for output coordinates (6 is about 0.1 m)",
+    )
+    parser.add_argument(
+        "--properties",
+        nargs="+",
+        help="only keep these input properties (lon/lat are always written)",
+    )
+    parser.add_argument(
+        "--columns",
+        nargs="*",
+        help="only read these input properties "
+        f"(no names: {' '.join(KEEP_PROPERTIES)})",
+    )
+    parser.add_argument("--minify", action="store_true", help="write compact single-line JSON")
+    add_order_argument(
+        parser,
+        default=None,
+        help=f"{ORDER_HELP} (default: hilbert, or source with --stream, since hilbert "
+        "order holds every output point in memory)",
+    )
+    parser.add_argument(
+        "--compress",
+        nargs="+",
+        choices=COMPRESSIONS,
+        default=[],
+        help="also write precompressed .gz/.br copies of the output",
+    )
+    args = parser.parse_args(argv)
+    if args.workers == 0:
+        args.workers = default_workers()
+    if args.columns == []:
+        args.columns = KEEP_PROPERTIES
+    if args.order is None:
+        args.order = "source" if args.stream else "hilbert"
+    return args
+
+
+def writer_options(args):
+    """FeatureWriter options requested on the command line, if any."""
+    options = {}
+    if args.precision is not None:
+        options["precision"] = args.precision
+    if args.properties:
+        options["properties"] = args.properties + ["lon", "lat"]
+    if args.minify:
+        options["minify"] = True
+    if args.compress:
+        options["compress"] = args.compress
+    return options
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("Starting script...")
+    centroid_fn = numpy_centroids if args.engine == "numpy" else shapely_centroids
+    options = writer_options(args)
+
+    cache = None
+    if args.cache:
+        # Output settings are part of the digest: changing them must rewrite the file.
+        settings = json.dumps([options, args.columns, args.order], sort_keys=True)
+        digest = f"{file_digest(args.input)}:{settings}"
+        cache = FeatureCache(cache_path_for(args.output), centroid_fn.__name__, validate=is_point)
+        if cache.input_digest == digest and os.path.exists(args.output):
+            print(f"{args.input} unchanged since last run; keeping {args.output}")
+            print("Done.")
+            return
+
+    if args.stream:
+        run_streaming(args.input, args.output, centroid_fn, args.workers, cache, options,
+                      args.columns, args.order)
+    elif args.engine == "numpy" or cache is not None or options or args.workers > 1:
+        # GeoPandas computes the same GEOS centroid as Shapely; the feature
+        # pipeline is used whenever an option needs it.
+        run_in_memory(args.input, args.output, centroid_fn, args.workers, cache, options,
+                      args.columns, args.order)
+    else:
+        run_geopandas(args.input, args.output, args.columns, args.order)
+
+    if cache is not None:
+        print(f"Cache: {cache.hits} reused, {cache.misses} computed")
+        cache.save(digest)
     print("Done.")
 
 if __name__ == "__main__":
     main()
-
-
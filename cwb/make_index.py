@@ -0,0 +1,138 @@
+"""Write a compact spatial index sidecar for the service areas.
+
+The sidecar holds, per service area, its PWSID, bounding box and
+centroid, sorted along a Hilbert curve, plus the upper levels of a packed
+Hilbert R-tree (the layout flatbush uses). A browser map can load it
+without any geometry and cull or hit-test locally: walk ``tree`` from the
+root to find candidate items whose box meets the view, then read their
+``ids``/``centroids``.
+
+Layout (all arrays flat, coordinates rounded to ``precision`` digits):
+
+    ids        PWSID per item, in Hilbert order
+    boxes      minx, miny, maxx, maxy per item
+    centroids  x, y per item
+    tree       one flat box array per level above the items; node i of a
+               level covers children i*nodeSize .. (i+1)*nodeSize - 1 of
+               the level below (level 0 of ``tree`` covers ``boxes``)
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+import centroid_engine
+from geojson_stream import dumps, iter_features
+from hilbert import hilbert_order
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+OUTPUT_INDEX = "mi_cwb_index.json"
+NODE_SIZE = 16
+PRECISION = 5
+
+
+def pack_levels(boxes, node_size=NODE_SIZE):
+    """Union boxes in groups of ``node_size`` until a single root box is left."""
+    levels = []
+    level = boxes
+    while len(level) > 1:
+        starts = np.arange(0, len(level), node_size)
+        parent = np.column_stack([
+            np.minimum.reduceat(level[:, 0], starts),
+            np.minimum.reduceat(level[:, 1], starts),
+            np.maximum.reduceat(level[:, 2], starts),
+            np.maximum.reduceat(level[:, 3], starts),
+        ])
+        levels.append(parent)
+        level = parent
+    return levels
+
+
+def build_index(features, node_size=NODE_SIZE, precision=PRECISION):
+    geometries = [feature["geometry"] for feature in features]
+    boxes = centroid_engine.bounds(geometries)
+    xs, ys = centroid_engine.centroids(geometries)
+    order = hilbert_order(
+        (boxes[:, 0] + boxes[:, 2]) / 2,
+        (boxes[:, 1] + boxes[:, 3]) / 2,
+    )
+    boxes = boxes[order]
+    levels = pack_levels(boxes, node_size)
+
+    scale = 10.0 ** precision
+
+    def flat(array):
+        return np.round(array, precision).ravel().tolist()
+
+    def flat_boxes(array):
+        # Round outwards so a rounded box still contains its feature.
+        rounded = np.column_stack([
+            np.floor(array[:, :2] * scale), np.ceil(array[:, 2:] * scale),
+        ]) / scale
+        return flat(rounded)
+
+    total = [boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()]
+    return {
+        "version": 1,
+        "nodeSize": node_size,
+        "precision": precision,
+        "bbox": [round(float(v), precision) for v in total],
+        "ids": [features[i]["properties"].get("PWSID") for i in order],
+        "boxes": flat_boxes(boxes),
+        "centroids": flat(np.column_stack([xs[order], ys[order]])),
+        "tree": [flat_boxes(level) for level in levels],
+    }
+
+
+def search(index, bbox):
+    """Return the item positions whose boxes intersect ``bbox``.
+
+    Reference implementation of the lookup the map does in JavaScript.
+    """
+    minx, miny, maxx, maxy = bbox
+    node_size = index["nodeSize"]
+    levels = [index["boxes"]] + index["tree"]
+
+    def hits(level, positions):
+        boxes = levels[level]
+        return [
+            i for i in positions
+            if boxes[4 * i] <= maxx and boxes[4 * i + 1] <= maxy
+            and boxes[4 * i + 2] >= minx and boxes[4 * i + 3] >= miny
+        ]
+
+    top = len(levels) - 1
+    candidates = hits(top, range(len(levels[top]) // 4))
+    for level in range(top - 1, -1, -1):
+        size = len(levels[level]) // 4
+        children = [c for i in candidates for c in range(i * node_size, min((i + 1) * node_size, size))]
+        candidates = hits(level, children)
+    return candidates
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the service-area index sidecar.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--output", default=OUTPUT_INDEX)
+    parser.add_argument("--node-size", type=int, default=NODE_SIZE)
+    parser.add_argument("--precision", type=int, default=PRECISION)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Loading polygons from {args.input}...")
+    features = list(iter_features(args.input, ["PWSID"]))
+    print("Read", len(features), "features")
+
+    index = build_index(features, args.node_size, args.precision)
+    with open(args.output, "wb") as f:
+        f.write(dumps(index, minify=True))
+    print(f"Wrote {len(index['ids'])} items, {len(index['tree'])} tree levels, "
+          f"{os.path.getsize(args.output):,} bytes to {args.output}")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Cut water system boundaries into Mapbox Vector Tiles.
+
+Boundaries from mi_cwb.geojson are joined to the per-system fields from
+lead-data.csv, projected to Web Mercator, simplified per zoom level and
+clipped into tiles. Tiles are packed into a single archive: PMTiles
+(``.pmtiles``, needs the ``pmtiles`` package) for static hosting with HTTP
+range requests, or MBTiles (``.mbtiles``, plain SQLite).
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import sqlite3
+from collections import defaultdict
+
+import mapbox_vector_tile
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from common import KEEP_PROPERTIES, repair
+from hilbert import add_order_argument, hilbert_sort
+from lead_data import LEAD_DATA_CSV, load_lead_data
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+OUTPUT_TILES = "mi_cwb.pmtiles"
+LAYER_NAME = "water_systems"
+MIN_ZOOM = 4
+MAX_ZOOM = 11
+
+EXTENT = 4096
+# Tile buffer in tile pixels, so strokes don't show seams at tile edges.
+BUFFER = 64
+EARTH_HALF = 20037508.342789244
+
+LEAD_PROPERTIES = ["status", "leadLines", "totalToReplace", "totalReplaced",
+                   "percentReplaced", "exceedance"]
+NUMBER_PROPERTIES = ["Population_Served_Count", "leadLines", "totalToReplace",
+                     "totalReplaced", "percentReplaced"]
+
+
+def to_mercator(geometries):
+    def project(coords):
+        x = coords[:, 0] * EARTH_HALF / 180.0
+        lat = np.clip(coords[:, 1], -85.0511, 85.0511)
+        y = np.log(np.tan((90.0 + lat) * math.pi / 360.0)) * EARTH_HALF / math.pi
+        return np.column_stack([x, y])
+
+    return shapely.transform(geometries, project)
+
+
+def tile_size(zoom):
+    return 2 * EARTH_HALF / (1 << zoom)
+
+
+def tile_bounds(zoom, x, y):
+    size = tile_size(zoom)
+    minx = -EARTH_HALF + x * size
+    maxy = EARTH_HALF - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tile_range(zoom, bounds):
+    size = tile_size(zoom)
+    last = (1 << zoom) - 1
+    minx, miny, maxx, maxy = bounds
+    x0 = min(last, max(0, int((minx + EARTH_HALF) // size)))
+    x1 = min(last, max(0, int((maxx + EARTH_HALF) // size)))
+    y0 = min(last, max(0, int((EARTH_HALF - maxy) // size)))
+    y1 = min(last, max(0, int((EARTH_HALF - miny) // size)))
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+
+def feature_properties(feature, lead_records):
+    props = feature["properties"]
+    out = {key: props[key] for key in KEEP_PROPERTIES if props.get(key) is not None}
+    record = lead_records.get(props.get("PWSID"))
+    if record is not None:
+        out.update((key, record[key]) for key in LEAD_PROPERTIES if record[key] != "")
+    return out
+
+
+def build_zoom(zoom, geometries, properties):
+    """Return ``{(x, y): encoded_tile}`` for one zoom level."""
+    pixel = tile_size(zoom) / EXTENT
+    simplified = shapely.simplify(geometries, pixel, preserve_topology=True)
+    margin = pixel * BUFFER
+
+    layers = defaultdict(list)
+    for geometry, props in zip(simplified, properties):
+        if geometry.is_empty:
+            continue
+        xs, ys = tile_range(zoom, geometry.bounds)
+        for x in xs:
+            for y in ys:
+                minx, miny, maxx, maxy = tile_bounds(zoom, x, y)
+                clipped = shapely.clip_by_rect(
+                    geometry, minx - margin, miny - margin, maxx + margin, maxy + margin
+                )
+                if not clipped.is_empty:
+                    layers[x, y].append({"geometry": clipped, "properties": props})
+
+    tiles = {}
+    for (x, y), features in layers.items():
+        tiles[x, y] = mapbox_vector_tile.encode(
+            {"name": LAYER_NAME, "features": features},
+            default_options={
+                "quantize_bounds": tile_bounds(zoom, x, y),
+                "extents": EXTENT,
+                "on_invalid_geometry": mapbox_vector_tile.encoder.on_invalid_geometry_make_valid,
+            },
+        )
+    return tiles
+
+
+def archive_metadata(name, min_zoom, max_zoom, bounds, fields):
+    minx, miny, maxx, maxy = bounds
+    return {
+        "name": name,
+        "format": "pbf",
+        "type": "overlay",
+        "minzoom": str(min_zoom),
+        "maxzoom": str(max_zoom),
+        "bounds": f"{minx:.6f},{miny:.6f},{maxx:.6f},{maxy:.6f}",
+        "center": f"{(minx + maxx) / 2:.6f},{(miny + maxy) / 2:.6f},{min_zoom}",
+        "json": json.dumps({
+            "vector_layers": [{
+                "id": LAYER_NAME,
+                "fields": fields,
+                "minzoom": min_zoom,
+                "maxzoom": max_zoom,
+            }],
+        }),
+    }
+
+
+def write_mbtiles(path, tiles, metadata):
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+    conn.execute(
+        "CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, "
+        "tile_row INTEGER, tile_data BLOB)"
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)"
+    )
+    conn.executemany("INSERT INTO metadata VALUES (?, ?)", metadata.items())
+    # MBTiles rows count from the bottom (TMS).
+    conn.executemany(
+        "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+        (((z, x, (1 << z) - 1 - y, data) for (z, x, y), data in tiles.items())),
+    )
+    conn.commit()
+    conn.close()
+
+
+def write_pmtiles(path, tiles, metadata):
+    try:
+        from pmtiles.convert import mbtiles_to_header_json
+        from pmtiles.tile import zxy_to_tileid
+        from pmtiles.writer import write
+    except ImportError:
+        raise SystemExit("Writing .pmtiles needs the pmtiles package: pip install pmtiles")
+
+    ordered = sorted((zxy_to_tileid(z, x, y), data) for (z, x, y), data in tiles.items())
+    header, pmtiles_metadata = mbtiles_to_header_json(metadata)
+    # MBTiles keeps vector_layers in a "json" string; PMTiles v3 wants
+    # them as top-level metadata keys.
+    pmtiles_metadata = dict(pmtiles_metadata)
+    pmtiles_metadata.update(json.loads(pmtiles_metadata.pop("json", "{}")))
+    with write(path) as writer:
+        for tile_id, data in ordered:
+            writer.write_tile(tile_id, data)
+        writer.finalize(header, pmtiles_metadata)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build vector tiles of water system boundaries.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--lead-data", default=LEAD_DATA_CSV)
+    parser.add_argument("--output", default=OUTPUT_TILES, help=".pmtiles or .mbtiles")
+    parser.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM)
+    add_order_argument(parser)
+    args = parser.parse_args(argv)
+    if not args.output.endswith((".pmtiles", ".mbtiles")):
+        parser.error("--output must end in .pmtiles or .mbtiles")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Loading polygons from {args.input}...")
+    with open(args.input, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    if args.order == "hilbert":
+        features = hilbert_sort(features)
+    geometries, repaired = repair(
+        np.array([shape(feature["geometry"]) for feature in features], dtype=object)
+    )
+    print("Read", len(features), "features; repaired", repaired)
+
+    lead_records = load_lead_data(args.lead_data)
+    properties = [feature_properties(feature, lead_records) for feature in features]
+    joined = sum(1 for feature in features if feature["properties"].get("PWSID") in lead_records)
+    print(f"Joined {joined} of {len(features)} boundaries to {args.lead_data}")
+
+    bounds = tuple(shapely.total_bounds(geometries))
+    mercator = to_mercator(geometries)
+
+    tiles = {}
+    for zoom in range(args.min_zoom, args.max_zoom + 1):
+        level = build_zoom(zoom, mercator, properties)
+        size = sum(len(data) for data in level.values())
+        print(f"  z{zoom}: {len(level)} tiles, {size:,} bytes")
+        tiles.update(((zoom, x, y), gzip.compress(data, mtime=0)) for (x, y), data in level.items())
+
+    fields = {key: "String" for key in KEEP_PROPERTIES + LEAD_PROPERTIES}
+    fields.update((key, "Number") for key in NUMBER_PROPERTIES)
+    name = os.path.splitext(os.path.basename(args.output))[0]
+    metadata = archive_metadata(name, args.min_zoom, args.max_zoom, bounds, fields)
+    print(f"Writing {len(tiles)} tiles to {args.output}...")
+    if args.output.endswith(".mbtiles"):
+        write_mbtiles(args.output, tiles, metadata)
+    else:
+        write_pmtiles(args.output, tiles, metadata)
+    print(f"Wrote {os.path.getsize(args.output):,} bytes")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
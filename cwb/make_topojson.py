@@ -0,0 +1,199 @@
+"""Export mi_cwb.geojson as TopoJSON with shared arcs.
+
+Neighbouring water systems store their common boundary twice in GeoJSON.
+Here coordinates are quantized to an integer grid, rings are cut at
+junctions (points where the neighbouring vertices differ between rings),
+and identical arcs, in either direction, are stored once. Arcs are
+delta-encoded, so most positions become small integers.
+"""
+
+import argparse
+import json
+import os
+
+from common import KEEP_PROPERTIES
+from hilbert import add_order_argument, hilbert_sort
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+OUTPUT_TOPOJSON = "mi_cwb.topojson"
+OBJECT_NAME = "water_systems"
+QUANTIZATION = 100000
+
+
+def polygons_of(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+def bounding_box(features):
+    minx = miny = float("inf")
+    maxx = maxy = float("-inf")
+    for feature in features:
+        for polygon in polygons_of(feature["geometry"]):
+            for ring in polygon:
+                for x, y in ring:
+                    minx, maxx = min(minx, x), max(maxx, x)
+                    miny, maxy = min(miny, y), max(maxy, y)
+    return minx, miny, maxx, maxy
+
+
+def quantize_ring(ring, translate, scale):
+    """Quantize a closed ring; drop repeated points and the closing point."""
+    tx, ty = translate
+    kx, ky = scale
+    points = []
+    for x, y in ring:
+        point = (round((x - tx) / kx), round((y - ty) / ky))
+        if not points or points[-1] != point:
+            points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+
+def find_junctions(rings):
+    """Points whose neighbours differ between the rings that use them."""
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, point in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % n]))
+            seen = neighbours.setdefault(point, pair)
+            if seen != pair:
+                junctions.add(point)
+    return junctions
+
+
+def canonical_closed(ring):
+    """Rotate a junction-free ring to start at its smallest point."""
+    start = ring.index(min(ring))
+    return ring[start:] + ring[:start]
+
+
+class ArcIndex:
+    def __init__(self):
+        self.arcs = []
+        self._index = {}
+        self.shared = 0
+
+    def add(self, points):
+        """Return the arc index for ``points``; ``~i`` when stored reversed."""
+        key = tuple(points)
+        if key in self._index:
+            self.shared += 1
+            return self._index[key]
+        reverse = key[::-1]
+        if reverse in self._index:
+            self.shared += 1
+            return ~self._index[reverse]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(points)
+        return len(self.arcs) - 1
+
+
+def ring_arcs(ring, junctions, arcs):
+    cuts = [i for i, point in enumerate(ring) if point in junctions]
+    if not cuts:
+        closed = canonical_closed(ring)
+        return [arcs.add(closed + closed[:1])]
+
+    start = cuts[0]
+    rotated = ring[start:] + ring[:start]
+    cuts = [i - start for i in cuts] + [len(ring)]
+    rotated.append(rotated[0])
+    return [arcs.add(rotated[a:b + 1]) for a, b in zip(cuts, cuts[1:])]
+
+
+def delta_encode(points):
+    out = [list(points[0])]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        out.append([x1 - x0, y1 - y0])
+    return out
+
+
+def build_topology(features, quantization=QUANTIZATION, keep=KEEP_PROPERTIES):
+    minx, miny, maxx, maxy = bounding_box(features)
+    translate = (minx, miny)
+    scale = (
+        (maxx - minx) / (quantization - 1) or 1.0,
+        (maxy - miny) / (quantization - 1) or 1.0,
+    )
+
+    quantized = [
+        [[quantize_ring(ring, translate, scale) for ring in polygon]
+         for polygon in polygons_of(feature["geometry"])]
+        for feature in features
+    ]
+    junctions = find_junctions(
+        ring for polygons in quantized for polygon in polygons for ring in polygon
+    )
+
+    arcs = ArcIndex()
+    geometries = []
+    for feature, polygons in zip(features, quantized):
+        polygon_arcs = [
+            [ring_arcs(ring, junctions, arcs) for ring in polygon if len(ring) > 2]
+            for polygon in polygons
+        ]
+        polygon_arcs = [polygon for polygon in polygon_arcs if polygon]
+        props = feature["properties"]
+        geometry = {"properties": {key: props.get(key) for key in keep}}
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+        if feature["geometry"]["type"] == "Polygon" and len(polygon_arcs) == 1:
+            geometry.update(type="Polygon", arcs=polygon_arcs[0])
+        else:
+            geometry.update(type="MultiPolygon", arcs=polygon_arcs)
+        geometries.append(geometry)
+
+    topology = {
+        "type": "Topology",
+        "bbox": [minx, miny, maxx, maxy],
+        "transform": {"scale": list(scale), "translate": list(translate)},
+        "objects": {OBJECT_NAME: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": [delta_encode(points) for points in arcs.arcs],
+    }
+    return topology, arcs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export service areas as TopoJSON.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--output", default=OUTPUT_TOPOJSON)
+    parser.add_argument(
+        "--quantization",
+        type=int,
+        default=QUANTIZATION,
+        help="grid positions per axis across the bounding box",
+    )
+    parser.add_argument("--properties", nargs="+", default=KEEP_PROPERTIES)
+    add_order_argument(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Loading polygons from {args.input}...")
+    with open(args.input, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    if args.order == "hilbert":
+        features = hilbert_sort(features)
+    print("Read", len(features), "features")
+
+    print("Building shared-arc topology...")
+    topology, arcs = build_topology(features, args.quantization, args.properties)
+    print(f"{len(arcs.arcs):,} arcs, {arcs.shared:,} ring segments reuse an existing arc")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(topology, f, separators=(",", ":"))
+
+    before = os.path.getsize(args.input)
+    after = os.path.getsize(args.output)
+    print(f"GeoJSON  {before:>14,} bytes")
+    print(f"TopoJSON {after:>14,} bytes ({after / before:.1%})")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
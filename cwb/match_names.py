@@ -0,0 +1,238 @@
+"""Reconcile lead-data.csv systems with EPA service areas by name and location.
+
+Every lead-data record is matched against the EPA systems in the centroid
+file. Instead of scoring all pairs, candidates are blocked two ways:
+
+* an inverted index of name character trigrams, skipping trigrams shared
+  by more than ``MAX_BLOCK`` names ("TOW", "SHI" ...), and
+* an STRtree of EPA centroids queried within ``--radius`` km of the
+  record's coordinates.
+
+Names are normalized (punctuation and spacing dropped, common
+abbreviations expanded) before trigrams are taken, so "IRON RIVER
+TOWNSHIPNASH" and "IRON RIVER TOWNSHIP-NASH" compare equal. Only
+candidates in a block are scored: Dice similarity of the trigram sets,
+each trigram weighted by its inverse document frequency so "TOWNSHIP" or
+"MOBILE HOME PARK" count for little, blended with proximity into a
+confidence. Records whose PWSID exists in the EPA file keep that match
+(method ``pwsid``) and report its name score, which flags IDs whose names
+disagree. The remaining records are only matched against EPA systems that
+no record claimed by PWSID, since each service area belongs to one system.
+"""
+
+import argparse
+import csv
+import math
+import re
+import time
+from collections import Counter
+
+import numpy as np
+import shapely
+
+from common import haversine
+from geojson_stream import iter_features
+from lead_data import LEAD_DATA_CSV, load_lead_data
+
+CENTROIDS_GEOJSON = "mi_cwb_centroids.geojson"
+OUTPUT_CSV = "name_matches.csv"
+# Trigrams shared by more names than this are too common to block on.
+MAX_BLOCK = 50
+RADIUS_KM = 15.0
+# Share of the confidence that comes from the name; the rest is proximity.
+NAME_WEIGHT = 0.8
+# Fuzzy matches below this confidence are reported with method "none".
+MIN_CONFIDENCE = 0.7
+ABBREVIATIONS = {
+    "TWP": "TOWNSHIP",
+    "TWSP": "TOWNSHIP",
+    "MHP": "MOBILE HOME PARK",
+    "MHC": "MOBILE HOME COMMUNITY",
+    "APTS": "APARTMENTS",
+    "CONDOS": "CONDOMINIUMS",
+    "WTR": "WATER",
+    "AUTH": "AUTHORITY",
+    "ASSN": "ASSOCIATION",
+    "VLG": "VILLAGE",
+}
+STOPWORDS = {"OF", "THE"}
+FIELDS = [
+    "pwsid", "name", "match_pwsid", "match_name", "method", "name_score",
+    "distance_km", "confidence", "candidates",
+]
+
+
+def normalize(name):
+    """Upper-case word list with punctuation removed and abbreviations expanded."""
+    words = re.findall(r"[A-Z0-9]+", (name or "").upper().replace("&", " AND "))
+    return [ABBREVIATIONS.get(word, word) for word in words if word not in STOPWORDS]
+
+
+def trigrams(name):
+    """Character trigrams of the normalized name, ignoring word breaks."""
+    text = "#" + "".join(normalize(name)) + "#"
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """Trigram and spatial blocking index over the EPA systems."""
+
+    def __init__(self, pwsids, names, lons, lats, max_block=MAX_BLOCK):
+        self.pwsids = pwsids
+        self.names = names
+        self.grams = [trigrams(name) for name in names]
+        self.position = {pwsid: i for i, pwsid in enumerate(pwsids)}
+        postings = {}
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: ids for gram, ids in postings.items() if len(ids) <= max_block}
+        # Trigrams the index has never seen are as rare as can be.
+        self.unseen = math.log(len(names) + 1)
+        self.idf = {gram: math.log((len(names) + 1) / len(ids)) for gram, ids in postings.items()}
+        self.lons = np.asarray(lons, dtype=float)
+        self.lats = np.asarray(lats, dtype=float)
+        self.tree = shapely.STRtree(shapely.points(self.lons, self.lats))
+
+    @classmethod
+    def from_file(cls, path=CENTROIDS_GEOJSON):
+        pwsids, names, lons, lats = [], [], [], []
+        for feature in iter_features(path, ["PWSID", "PWS_Name"]):
+            pwsids.append(feature["properties"]["PWSID"])
+            names.append(feature["properties"].get("PWS_Name") or "")
+            lon, lat = feature["geometry"]["coordinates"]
+            lons.append(lon)
+            lats.append(lat)
+        return cls(pwsids, names, lons, lats)
+
+    def nearby(self, lons, lats, radius_km):
+        """``(record, system)`` index pairs within roughly ``radius_km`` of each other."""
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        known = np.flatnonzero(~(np.isnan(lons) | np.isnan(lats)))
+        if not len(known):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        # Widened by the shortest longitude degree in the batch, so this over-selects.
+        shrink = max(math.cos(math.radians(np.abs(lats[known]).max())), 0.1)
+        points = shapely.points(lons[known], lats[known])
+        record, system = self.tree.query(points, predicate="dwithin",
+                                         distance=radius_km / 111.0 / shrink)
+        return known[record], system
+
+    def weight(self, grams):
+        return sum(self.idf.get(gram, self.unseen) for gram in grams)
+
+    def similarity(self, grams, j):
+        """IDF-weighted Dice similarity of ``grams`` and system ``j``'s name."""
+        total = self.weight(grams) + self.weight(self.grams[j])
+        return 2 * self.weight(grams & self.grams[j]) / total if total else 0.0
+
+    def candidates(self, grams):
+        """Systems whose names share at least one trigram with ``grams``."""
+        found = set()
+        for gram in grams:
+            found.update(self.postings.get(gram, ()))
+        return found
+
+
+def match(records, index, radius_km=RADIUS_KM, use_pwsid=True):
+    """Return one match row per lead-data record and the number of pairs scored.
+
+    With ``use_pwsid=False`` every record is matched on name and location
+    alone, for lists whose IDs can't be trusted.
+    """
+    pwsids = list(records)
+    lons = np.array([records[p]["longitude"] or np.nan for p in pwsids], dtype=float)
+    lats = np.array([records[p]["latitude"] or np.nan for p in pwsids], dtype=float)
+
+    spatial = [set() for _ in pwsids]
+    for record, system in zip(*index.nearby(lons, lats, radius_km)):
+        spatial[record].add(int(system))
+
+    position = index.position if use_pwsid else {}
+    claimed = {position[p] for p in pwsids if p in position}
+
+    rows = []
+    scored = 0
+    for i, pwsid in enumerate(pwsids):
+        name = records[pwsid]["name"]
+        grams = trigrams(name)
+        own = position.get(pwsid)
+        if own is None:
+            block = (index.candidates(grams) | spatial[i]) - claimed
+        else:
+            block = {own}
+        scored += len(block)
+
+        best = None
+        for j in block:
+            score = index.similarity(grams, j)
+            distance = np.nan
+            proximity = 0.0
+            if not np.isnan(lats[i]):
+                distance = float(haversine(lons[i], lats[i], index.lons[j], index.lats[j]))
+                proximity = max(0.0, 1 - distance / radius_km)
+            confidence = 1.0 if j == own else NAME_WEIGHT * score + (1 - NAME_WEIGHT) * proximity
+            if best is None or confidence > best[0]:
+                best = (confidence, j, score, distance)
+
+        row = {"pwsid": pwsid, "name": name, "candidates": len(block)}
+        if best is None:
+            row.update(match_pwsid="", match_name="", method="none", name_score="",
+                       distance_km="", confidence=0)
+        else:
+            confidence, j, score, distance = best
+            if j == own:
+                method = "pwsid"
+            else:
+                method = "name" if confidence >= MIN_CONFIDENCE else "none"
+            row.update(
+                match_pwsid=index.pwsids[j],
+                match_name=index.names[j],
+                method=method,
+                name_score=round(score, 3),
+                distance_km="" if np.isnan(distance) else round(distance, 2),
+                confidence=round(confidence, 3),
+            )
+        rows.append(row)
+    return rows, scored
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Match lead-data systems to EPA service areas.")
+    parser.add_argument("--lead-data", default=LEAD_DATA_CSV)
+    parser.add_argument("--systems", default=CENTROIDS_GEOJSON,
+                        help="EPA point file with PWSID and PWS_Name")
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--radius", type=float, default=RADIUS_KM,
+                        help="km around a record's coordinates to search for candidates")
+    parser.add_argument("--ignore-pwsid", action="store_true",
+                        help="match on name and location only, even where PWSIDs agree")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    records = load_lead_data(args.lead_data)
+    index = NameIndex.from_file(args.systems)
+    print(f"Matching {len(records)} lead-data systems against {len(index.pwsids)} EPA systems...")
+
+    start = time.perf_counter()
+    rows, scored = match(records, index, args.radius, use_pwsid=not args.ignore_pwsid)
+    elapsed = time.perf_counter() - start
+    methods = Counter(row["method"] for row in rows)
+    print(f"Scored {scored:,} candidate pairs instead of {len(records) * len(index.pwsids):,} "
+          f"in {elapsed:.2f}s")
+    print("  " + ", ".join(f"{method} {count}" for method, count in sorted(methods.items())))
+    disagree = sum(1 for row in rows if row["method"] == "pwsid" and row["name_score"] < 0.5)
+    print(f"  {disagree} PWSID matches with dissimilar names")
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {args.output}")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
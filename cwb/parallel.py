@@ -0,0 +1,35 @@
+"""Order-preserving process-pool map used by the geometry pipeline stages."""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def imap_ordered(fn, tasks, workers=1):
+    """Yield ``(context, fn(arg))`` for each ``(context, arg)`` in ``tasks``.
+
+    Results come back in input order. ``context`` stays in this process and
+    only ``arg`` is sent to a worker, so callers can keep properties local
+    and ship just the geometry. At most ``2 * workers`` tasks are in flight
+    at once, which keeps memory bounded when ``tasks`` is a stream.
+    With ``workers <= 1`` everything runs inline.
+    """
+    if workers <= 1:
+        for context, arg in tasks:
+            yield context, fn(arg)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for context, arg in tasks:
+            pending.append((context, pool.submit(fn, arg)))
+            if len(pending) >= 2 * workers:
+                context, future = pending.popleft()
+                yield context, future.result()
+        while pending:
+            context, future = pending.popleft()
+            yield context, future.result()
@@ -0,0 +1,144 @@
+"""Answer "which water system serves this location" for batches of points.
+
+Service areas are loaded into a Shapely STRtree once; each batch of
+lat/lon points is then answered with one vectorized ``covered_by`` query
+instead of a linear scan over polygons, so a point on a boundary counts
+as inside. Where service areas overlap, the smallest containing area
+wins, since it is the more specific system. Matches are joined to the
+lead-data.csv record for that PWSID.
+
+Boundaries load from the GeoParquet copy written by ``export_formats.py``
+when it is up to date. Its geometry is already repaired, so loading skips
+both JSON parsing and ``make_valid``.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from common import repair
+from lead_data import LEAD_DATA_CSV, load_lead_data
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+INPUT_PARQUET = "mi_cwb.parquet"
+
+
+def default_boundaries():
+    """The GeoParquet copy if it is at least as new as the GeoJSON, else the GeoJSON."""
+    if os.path.exists(INPUT_PARQUET) and (
+        not os.path.exists(INPUT_GEOJSON)
+        or os.path.getmtime(INPUT_PARQUET) >= os.path.getmtime(INPUT_GEOJSON)
+    ):
+        return INPUT_PARQUET
+    return INPUT_GEOJSON
+
+
+def read_geojson(path):
+    """``(geometries, pwsids, names)`` arrays from a GeoJSON FeatureCollection."""
+    with open(path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    return (
+        np.array([shape(f["geometry"]) for f in features], dtype=object),
+        np.array([f["properties"]["PWSID"] for f in features], dtype=object),
+        np.array([f["properties"].get("PWS_Name") for f in features], dtype=object),
+    )
+
+
+def read_parquet(path):
+    """``(geometries, pwsids, names)`` arrays from a GeoParquet file."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=["PWSID", "PWS_Name", "geometry"])
+    return (
+        shapely.from_wkb(table.column("geometry").to_numpy()),
+        np.array(table.column("PWSID").to_pylist(), dtype=object),
+        np.array(table.column("PWS_Name").to_pylist(), dtype=object),
+    )
+
+
+class ServiceAreaIndex:
+    def __init__(self, geometries, pwsids, names, lead_records=None):
+        # Only invalid geometries are repaired; a repaired GeoParquet
+        # source has none, so this is a cheap validity pass.
+        self.geometries, _ = repair(geometries)
+        self.pwsids = pwsids
+        self.names = names
+        self.areas = shapely.area(self.geometries)
+        self.lead_records = lead_records or {}
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_files(cls, boundaries=None, lead_data=LEAD_DATA_CSV):
+        boundaries = boundaries or default_boundaries()
+        read = read_parquet if boundaries.endswith(".parquet") else read_geojson
+        return cls(*read(boundaries), load_lead_data(lead_data))
+
+    def locate(self, lats, lons):
+        """Return the index of the serving polygon for each point, -1 if none."""
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        point_idx, area_idx = self.tree.query(points, predicate="covered_by")
+        result = np.full(len(points), -1, dtype=np.int64)
+        if len(point_idx):
+            # Sort by point, then by area, and keep the first hit per point.
+            order = np.lexsort((self.areas[area_idx], point_idx))
+            point_idx, area_idx = point_idx[order], area_idx[order]
+            first = np.r_[True, point_idx[1:] != point_idx[:-1]]
+            result[point_idx[first]] = area_idx[first]
+        return result
+
+    def lookup(self, lats, lons):
+        """Return one dict per point with the serving PWSID and its lead record."""
+        results = []
+        for index in self.locate(lats, lons):
+            if index < 0:
+                results.append({"pwsid": None, "pwsName": None, "lead": None})
+                continue
+            pwsid = self.pwsids[index]
+            results.append({
+                "pwsid": pwsid,
+                "pwsName": self.names[index],
+                "lead": self.lead_records.get(pwsid),
+            })
+        return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Look up the water system serving a point.")
+    parser.add_argument(
+        "--point",
+        type=float,
+        nargs=2,
+        action="append",
+        metavar=("LAT", "LON"),
+        required=True,
+    )
+    parser.add_argument(
+        "--boundaries",
+        help=f"service areas (default: {INPUT_PARQUET} if up to date, else {INPUT_GEOJSON})",
+    )
+    parser.add_argument("--lead-data", default=LEAD_DATA_CSV)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    index = ServiceAreaIndex.from_files(args.boundaries, args.lead_data)
+    print(f"Indexed {len(index.pwsids)} service areas in {time.perf_counter() - start:.2f}s")
+
+    lats, lons = zip(*args.point)
+    start = time.perf_counter()
+    results = index.lookup(lats, lons)
+    print(f"Answered {len(results)} point(s) in {(time.perf_counter() - start) * 1000:.1f}ms")
+    for (lat, lon), result in zip(args.point, results):
+        lead = result["lead"] or {}
+        print(f"  {lat:.5f}, {lon:.5f} -> {result['pwsid'] or '-'} {result['pwsName'] or ''}"
+              f" | status: {lead.get('status', '-')}, lead lines: {lead.get('leadLines', '-')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Split the national service-area file into per-state shards and process them.
+
+The national EPA community water system boundary file is streamed once
+and partitioned by ``Primacy_Agency`` into ``<output-dir>/<state>/``
+shards named like the Michigan files (``oh_cwb.geojson``). The shards are
+then processed in a process pool, largest first, into
+``<state>_cwb_centroids.geojson``, and ``manifest.json`` records each
+shard's files, feature count, bounding box and content digest. Shards
+whose boundaries are unchanged since the last manifest are not
+reprocessed, so a dashboard for one state or its neighbours only ever
+loads its own shard.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from contextlib import ExitStack
+
+import numpy as np
+
+import centroid_engine
+from feature_cache import file_digest
+from geojson_stream import FeatureWriter, iter_features
+from make_centroids import numpy_centroids, write_centroids
+from parallel import default_workers, imap_ordered
+
+OUTPUT_DIR = "states"
+MANIFEST = "manifest.json"
+SHARD_FIELD = "Primacy_Agency"
+# Features per vectorized centroid batch inside a shard.
+BATCH_SIZE = 4096
+
+
+def shard_name(agency):
+    """File-safe lowercase shard name for a primacy agency (``"MI"`` -> ``"mi"``)."""
+    name = re.sub(r"[^0-9a-z]+", "_", str(agency or "unknown").strip().lower()).strip("_")
+    return name or "unknown"
+
+
+def shard_paths(output_dir, name):
+    folder = os.path.join(output_dir, name)
+    return {
+        "boundaries": os.path.join(folder, f"{name}_cwb.geojson"),
+        "centroids": os.path.join(folder, f"{name}_cwb_centroids.geojson"),
+    }
+
+
+def partition(input_path, output_dir, states=None):
+    """Stream ``input_path`` into one boundary file per primacy agency.
+
+    Returns ``{name: (agency, feature count)}``. With ``states``, features of
+    other agencies are skipped.
+    """
+    wanted = {shard_name(state) for state in states} if states else None
+    writers = {}
+    agencies = {}
+    with ExitStack() as stack:
+        for feature in iter_features(input_path):
+            agency = feature["properties"].get(SHARD_FIELD)
+            name = shard_name(agency)
+            if wanted is not None and name not in wanted:
+                continue
+            writer = writers.get(name)
+            if writer is None:
+                path = shard_paths(output_dir, name)["boundaries"]
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer = stack.enter_context(FeatureWriter(path, name=f"{name}_cwb"))
+                writers[name] = writer
+                agencies[name] = agency
+            writer.write(feature)
+    return {name: (agencies[name], writer.count) for name, writer in writers.items()}
+
+
+def process_shard(paths):
+    """Worker entry point: centroids and extent of one shard."""
+    start = time.perf_counter()
+    features = list(iter_features(paths["boundaries"]))
+    write_centroids(features, paths["centroids"], numpy_centroids, BATCH_SIZE, order="hilbert")
+    boxes = centroid_engine.bounds(feature["geometry"] for feature in features)
+    bbox = [float(np.nanmin(boxes[:, 0])), float(np.nanmin(boxes[:, 1])),
+            float(np.nanmax(boxes[:, 2])), float(np.nanmax(boxes[:, 3]))]
+    return bbox, time.perf_counter() - start
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {"shards": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Shard the national boundaries by state.")
+    parser.add_argument("input", help="national community water system boundary GeoJSON")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument(
+        "--states",
+        nargs="+",
+        help="only shard these primacy agencies (e.g. MI OH IN WI)",
+    )
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = one per CPU)")
+    parser.add_argument("--force", action="store_true", help="reprocess unchanged shards too")
+    args = parser.parse_args(argv)
+    if args.workers == 0:
+        args.workers = default_workers()
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    manifest_path = os.path.join(args.output_dir, MANIFEST)
+    previous = load_manifest(manifest_path)["shards"]
+
+    print(f"Partitioning {args.input} by {SHARD_FIELD}...")
+    start = time.perf_counter()
+    shards = partition(args.input, args.output_dir, args.states)
+    print(f"Wrote {len(shards)} shards, {sum(n for _, n in shards.values()):,} features "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    entries = {}
+    tasks = []
+    for name, (agency, count) in shards.items():
+        paths = shard_paths(args.output_dir, name)
+        digest = file_digest(paths["boundaries"])
+        old = previous.get(name)
+        entries[name] = {
+            "agency": agency,
+            "features": count,
+            "digest": digest,
+            "boundaries": os.path.relpath(paths["boundaries"], args.output_dir),
+            "centroids": os.path.relpath(paths["centroids"], args.output_dir),
+        }
+        if (not args.force and old and old.get("digest") == digest
+                and os.path.exists(paths["centroids"])):
+            entries[name]["bbox"] = old["bbox"]
+            continue
+        tasks.append((count, name, paths))
+
+    # Largest shards first so one big state doesn't finish last on its own.
+    tasks.sort(key=lambda task: (-task[0], task[1]))
+    print(f"Processing {len(tasks)} changed shard(s) with {args.workers} worker(s); "
+          f"{len(shards) - len(tasks)} unchanged")
+    start = time.perf_counter()
+    for name, (bbox, seconds) in imap_ordered(
+            process_shard, ((name, paths) for _, name, paths in tasks), args.workers):
+        entries[name]["bbox"] = bbox
+        print(f"  {name}: {entries[name]['features']:,} features in {seconds:.2f}s")
+    print(f"Processed shards in {time.perf_counter() - start:.1f}s")
+
+    if args.states:
+        # A partial run leaves the other states' shards in place.
+        for name, entry in previous.items():
+            entries.setdefault(name, entry)
+
+    manifest = {
+        "source": os.path.basename(args.input),
+        "sourceDigest": file_digest(args.input),
+        "shardField": SHARD_FIELD,
+        "shards": dict(sorted(entries.items())),
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {manifest_path}")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Write simplified copies of mi_cwb.geojson for a range of map zoom levels.
+
+Each level is simplified with a tolerance of about one screen pixel at
+that zoom, snapped to a matching coordinate grid, and trimmed to the
+properties the map needs. The service areas are simplified together as a
+coverage: an edge shared by two systems is simplified once, so
+neighbours keep a common border instead of opening gaps and overlaps,
+and every level renders as valid geometry. A system too small to survive
+the grid at a level is written as a point on its surface, never dropped.
+"""
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+
+from common import KEEP_PROPERTIES, repair
+from geojson_stream import FeatureWriter
+from hilbert import add_order_argument, hilbert_sort
+
+INPUT_GEOJSON = "mi_cwb.geojson"
+ZOOMS = [5, 7, 9, 11]
+
+
+def tolerance_for_zoom(zoom):
+    """Degrees covered by one 256px web-map tile pixel at ``zoom``."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def precision_for_tolerance(tolerance):
+    """Decimal places giving a grid ten times finer than ``tolerance``."""
+    return max(0, math.ceil(-math.log10(tolerance / 10)))
+
+
+def output_path_for(input_path, zoom, output_dir):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{stem}_z{zoom}.geojson")
+
+
+def simplify_level(geometries, zoom):
+    """Simplify ``geometries`` for ``zoom``; return them, the grid digits and collapsed indices.
+
+    Geometries that collapse to nothing on the grid are replaced by a
+    point on the source geometry's surface.
+    """
+    tolerance = tolerance_for_zoom(zoom)
+    digits = precision_for_tolerance(tolerance)
+    simplified = shapely.coverage_simplify(geometries, tolerance)
+    simplified = shapely.set_precision(simplified, 10.0 ** -digits)
+    collapsed = np.flatnonzero(shapely.is_empty(simplified))
+    simplified[collapsed] = shapely.point_on_surface(geometries[collapsed])
+    return simplified, digits, collapsed
+
+
+def write_level(path, features, geometries, digits, keep):
+    name = os.path.splitext(os.path.basename(path))[0]
+    with FeatureWriter(path, name=name, precision=digits) as writer:
+        for feature, geometry in zip(features, geometries):
+            props = feature["properties"]
+            writer.write({
+                "type": "Feature",
+                "properties": {key: props.get(key) for key in keep},
+                "geometry": mapping(geometry),
+            })
+    return writer.count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build a simplified boundary pyramid.")
+    parser.add_argument("--input", default=INPUT_GEOJSON)
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--zooms", type=int, nargs="+", default=ZOOMS)
+    parser.add_argument(
+        "--properties",
+        nargs="+",
+        default=KEEP_PROPERTIES,
+        help="feature properties to keep in the simplified files",
+    )
+    add_order_argument(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Loading polygons from {args.input}...")
+    with open(args.input, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    if args.order == "hilbert":
+        features = hilbert_sort(features)
+    geometries = np.array([shape(feature["geometry"]) for feature in features], dtype=object)
+    print("Read", len(features), "features")
+    geometries, repaired = repair(geometries)
+    if repaired:
+        print("Repaired", repaired, "invalid source geometries")
+
+    source_vertices = int(shapely.get_num_coordinates(geometries).sum())
+    source_bytes = os.path.getsize(args.input)
+    rows = [("source", "-", "-", len(features), source_vertices, source_bytes)]
+
+    for zoom in sorted(args.zooms):
+        path = output_path_for(args.input, zoom, args.output_dir)
+        print(f"Simplifying for zoom {zoom} -> {path}...")
+        simplified, digits, collapsed = simplify_level(geometries, zoom)
+        if len(collapsed):
+            pwsids = ", ".join(str(features[i]["properties"].get("PWSID")) for i in collapsed)
+            print(f"  {len(collapsed)} systems smaller than the grid written as points: {pwsids}")
+        count = write_level(path, features, simplified, digits, args.properties)
+        vertices = int(shapely.get_num_coordinates(simplified).sum())
+        rows.append((f"z{zoom}", f"{tolerance_for_zoom(zoom):.6f}", digits, count,
+                     vertices, os.path.getsize(path)))
+
+    print()
+    print(f"{'level':<8}{'tolerance':>12}{'digits':>8}{'features':>10}{'vertices':>12}{'bytes':>14}")
+    for level, tolerance, digits, count, vertices, size in rows:
+        print(f"{level:<8}{tolerance:>12}{digits:>8}{count:>10}{vertices:>12,}{size:>14,}")
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
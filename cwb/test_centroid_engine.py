@@ -0,0 +1,109 @@
+"""centroid_engine's NumPy centroids and bounds match Shapely."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+from shapely.geometry import shape
+
+import centroid_engine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVICE_AREAS = os.path.join(HERE, "mi_cwb.geojson")
+
+SQUARE = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+HOLE = [[1, 1], [1, 2], [2, 2], [2, 1], [1, 1]]
+
+
+def reverse(ring):
+    return ring[::-1]
+
+
+def offset(ring, dx, dy):
+    return [[x + dx, y + dy] for x, y in ring]
+
+
+GEOMETRIES = {
+    "square": {"type": "Polygon", "coordinates": [SQUARE]},
+    "clockwise square": {"type": "Polygon", "coordinates": [reverse(SQUARE)]},
+    "triangle": {"type": "Polygon", "coordinates": [[[0, 0], [3, 0], [0, 6], [0, 0]]]},
+    "hole": {"type": "Polygon", "coordinates": [SQUARE, HOLE]},
+    "hole, same winding as shell": {"type": "Polygon", "coordinates": [SQUARE, reverse(HOLE)]},
+    "two holes": {
+        "type": "Polygon",
+        "coordinates": [offset(SQUARE, 0, 0), HOLE, offset(HOLE, 1.5, 1.5)],
+    },
+    "multipolygon": {
+        "type": "MultiPolygon",
+        "coordinates": [[SQUARE], [offset(SQUARE, 10, 3)]],
+    },
+    "multipolygon with holes, mixed winding": {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [SQUARE, HOLE],
+            [reverse(offset(SQUARE, -8, 5)), offset(HOLE, -8, 5)],
+            [offset([[0, 0], [1, 0], [0, 1], [0, 0]], 20, 20)],
+        ],
+    },
+    "far from origin": {
+        "type": "Polygon",
+        "coordinates": [offset(SQUARE, -86.123456, 44.654321), offset(HOLE, -86.123456, 44.654321)],
+    },
+}
+
+
+def shapely_centroids(geometries):
+    points = [shape(geometry).centroid for geometry in geometries]
+    return np.array([p.x for p in points]), np.array([p.y for p in points])
+
+
+@pytest.mark.parametrize("name", GEOMETRIES)
+def test_centroid_matches_shapely(name):
+    geometry = GEOMETRIES[name]
+    xs, ys = centroid_engine.centroids([geometry])
+    expected = shape(geometry).centroid
+    assert xs[0] == pytest.approx(expected.x, abs=1e-12)
+    assert ys[0] == pytest.approx(expected.y, abs=1e-12)
+
+
+def test_batch_matches_one_at_a_time():
+    geometries = list(GEOMETRIES.values())
+    xs, ys = centroid_engine.centroids(geometries)
+    expected_xs, expected_ys = shapely_centroids(geometries)
+    np.testing.assert_allclose(xs, expected_xs, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(ys, expected_ys, rtol=0, atol=1e-12)
+
+
+def test_degenerate_falls_back_to_vertex_mean():
+    line = {"type": "Polygon", "coordinates": [[[0, 0], [2, 0], [4, 0], [0, 0]]]}
+    xs, ys = centroid_engine.centroids([line, GEOMETRIES["square"]])
+    assert (xs[0], ys[0]) == pytest.approx((1.5, 0.0))
+    assert (xs[1], ys[1]) == pytest.approx((2.0, 2.0))
+
+
+def test_empty_input():
+    xs, ys = centroid_engine.centroids([])
+    assert len(xs) == len(ys) == 0
+    assert centroid_engine.bounds([]).shape == (0, 4)
+
+
+def test_unsupported_geometry():
+    with pytest.raises(ValueError):
+        centroid_engine.centroids([{"type": "Point", "coordinates": [0, 0]}])
+
+
+def test_bounds_match_shapely():
+    geometries = list(GEOMETRIES.values())
+    expected = np.array([shape(geometry).bounds for geometry in geometries])
+    np.testing.assert_array_equal(centroid_engine.bounds(geometries), expected)
+
+
+@pytest.mark.skipif(not os.path.exists(SERVICE_AREAS), reason="mi_cwb.geojson not present")
+def test_service_areas_match_shapely():
+    with open(SERVICE_AREAS, encoding="utf-8") as f:
+        geometries = [feature["geometry"] for feature in json.load(f)["features"]]
+    xs, ys = centroid_engine.centroids(geometries)
+    expected_xs, expected_ys = shapely_centroids(geometries)
+    np.testing.assert_allclose(xs, expected_xs, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(ys, expected_ys, rtol=0, atol=1e-9)
@@ -0,0 +1,92 @@
+"""diff_releases ignores export noise and reports real changes."""
+
+import json
+
+from diff_releases import diff_releases, geometry_hashes, release_index
+
+SHELL = [[-85.0, 44.0], [-84.9, 44.0], [-84.9, 44.1], [-85.0, 44.1], [-85.0, 44.0]]
+HOLE = [[-84.98, 44.02], [-84.98, 44.04], [-84.96, 44.04], [-84.96, 44.02], [-84.98, 44.02]]
+OTHER = [[-83.0, 42.0], [-82.9, 42.0], [-82.9, 42.1], [-83.0, 42.0]]
+
+
+def rotate(ring, steps):
+    """The same closed ring, starting at another vertex."""
+    open_ring = ring[:-1]
+    open_ring = open_ring[steps:] + open_ring[:steps]
+    return open_ring + [open_ring[0]]
+
+
+def jitter(ring, amount=2e-9):
+    return [[x + amount, y - amount] for x, y in ring]
+
+
+def multipolygon(*polygons):
+    return {"type": "MultiPolygon", "coordinates": list(polygons)}
+
+
+BASE = multipolygon([SHELL, HOLE], [OTHER])
+
+
+def test_hash_ignores_winding_start_vertex_part_order_and_noise():
+    variants = [
+        multipolygon([SHELL[::-1], HOLE[::-1]], [OTHER[::-1]]),
+        multipolygon([rotate(SHELL, 2), rotate(HOLE, 1)], [rotate(OTHER, 1)]),
+        multipolygon([OTHER], [SHELL, HOLE]),
+        multipolygon([jitter(SHELL), jitter(HOLE)], [jitter(OTHER)]),
+    ]
+    hashes = geometry_hashes([BASE] + variants)
+    assert len(set(hashes)) == 1
+
+
+def test_hash_detects_real_changes():
+    moved = [[x, y + 0.001] if (x, y) == (-84.9, 44.1) else [x, y] for x, y in SHELL]
+    changed = [
+        multipolygon([SHELL], [OTHER]),
+        multipolygon([moved, HOLE], [OTHER]),
+        multipolygon([SHELL, HOLE]),
+    ]
+    hashes = geometry_hashes([BASE] + changed)
+    assert len(set(hashes)) == len(hashes)
+
+
+def test_missing_geometry_has_no_hash():
+    assert geometry_hashes([None, BASE])[0] is None
+
+
+def write_release(path, systems):
+    features = [
+        {"type": "Feature", "properties": properties, "geometry": geometry}
+        for properties, geometry in systems
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return str(path)
+
+
+def test_diff_releases(tmp_path):
+    polygon = {"type": "Polygon", "coordinates": [SHELL]}
+    reversed_polygon = {"type": "Polygon", "coordinates": [SHELL[::-1]]}
+    other = {"type": "Polygon", "coordinates": [OTHER]}
+    old = write_release(tmp_path / "old.geojson", [
+        ({"PWSID": "MI01", "PWS_Name": "A", "OBJECTID": 1}, polygon),
+        ({"PWSID": "MI02", "PWS_Name": "B", "OBJECTID": 2}, polygon),
+        ({"PWSID": "MI03", "PWS_Name": "C", "OBJECTID": 3}, polygon),
+        ({"PWSID": "MI04", "PWS_Name": "D", "OBJECTID": 4}, polygon),
+    ])
+    new = write_release(tmp_path / "new.geojson", [
+        # Re-exported with new OBJECTIDs and reversed rings: unchanged.
+        ({"PWSID": "MI01", "PWS_Name": "A", "OBJECTID": 11}, reversed_polygon),
+        ({"PWSID": "MI02", "PWS_Name": "B", "OBJECTID": 12}, other),
+        ({"PWSID": "MI03", "PWS_Name": "C2", "OBJECTID": 13}, polygon),
+        ({"PWSID": "MI05", "PWS_Name": "E", "OBJECTID": 15}, polygon),
+    ])
+    old_index, _ = release_index(old)
+    new_index, _ = release_index(new)
+    report = diff_releases(old_index, new_index)
+    assert report == {
+        "added": ["MI05"],
+        "removed": ["MI04"],
+        "reshaped": ["MI02"],
+        "attributes": {"MI03": ["PWS_Name"]},
+        "rebuild": ["MI02", "MI03", "MI05"],
+    }
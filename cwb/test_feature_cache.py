@@ -0,0 +1,114 @@
+"""FeatureCache hits, invalidation and recovery, alone and in make_centroids."""
+
+import json
+
+import pytest
+
+import make_centroids
+from feature_cache import FeatureCache, feature_key, is_point
+
+
+def square(x, y):
+    return {"type": "Polygon", "coordinates": [[[x, y], [x + 1, y], [x + 1, y + 1], [x, y + 1], [x, y]]]}
+
+
+def feature(pwsid, geometry):
+    return {"type": "Feature", "properties": {"PWSID": pwsid}, "geometry": geometry}
+
+
+def test_hits_after_save(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = FeatureCache(path, "engine")
+    assert cache.get("a") is None and cache.misses == 1
+    cache.put("a", [1.0, 2.0])
+    cache.save("digest")
+
+    cache = FeatureCache(path, "engine")
+    assert cache.input_digest == "digest"
+    assert cache.get("a") == [1.0, 2.0] and cache.hits == 1
+
+
+def test_fingerprint_change_invalidates(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = FeatureCache(path, "engine")
+    cache.put("a", [1.0, 2.0])
+    cache.save("digest")
+
+    cache = FeatureCache(path, "other engine")
+    assert cache.input_digest is None and cache.get("a") is None
+
+
+def test_unused_entries_are_dropped(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = FeatureCache(path, "engine")
+    cache.put("a", [1.0, 2.0])
+    cache.put("b", [3.0, 4.0])
+    cache.save("digest")
+
+    cache = FeatureCache(path, "engine")
+    cache.get("a")
+    cache.save("digest")
+    assert FeatureCache(path, "engine").get("b") is None
+
+
+@pytest.mark.parametrize("text", [
+    '{"fingerprint": "engine", "entr',
+    "[1, 2]",
+    '{"fingerprint": "engine", "entries": []}',
+])
+def test_unreadable_file_is_ignored(tmp_path, text):
+    path = tmp_path / "cache.json"
+    path.write_text(text)
+    cache = FeatureCache(str(path), "engine")
+    assert cache.input_digest is None and cache.get("a") is None
+    cache.put("a", [1.0, 2.0])
+    cache.save("digest")
+    assert FeatureCache(str(path), "engine").get("a") == [1.0, 2.0]
+
+
+def test_invalid_entries_are_misses(tmp_path):
+    path = tmp_path / "cache.json"
+    entries = {"good": [1.0, 2.0], "null": None, "short": [1.0], "text": "1,2", "nan": [float("nan"), 0.0]}
+    path.write_text(json.dumps({"fingerprint": "engine", "input_digest": "d", "entries": entries}))
+    cache = FeatureCache(str(path), "engine", validate=is_point)
+    assert [cache.get(key) for key in entries] == [[1.0, 2.0], None, None, None, None]
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_feature_key():
+    a = {"type": "Feature", "properties": {"PWSID": "MI01", "PWS_Name": "A"}, "geometry": square(0, 0)}
+    reordered = dict(a, properties={"PWS_Name": "A", "PWSID": "MI01"})
+    assert feature_key(a) == feature_key(reordered)
+    assert feature_key(a) != feature_key(dict(a, geometry=square(0, 1)))
+    assert feature_key(a) != feature_key(dict(a, properties={"PWSID": "MI02", "PWS_Name": "A"}))
+
+
+def run_centroids(tmp_path, capsys, *options):
+    make_centroids.main([
+        "--engine", "numpy", "--cache", "--input", str(tmp_path / "in.geojson"),
+        "--output", str(tmp_path / "out.geojson"), *options,
+    ])
+    return capsys.readouterr().out
+
+
+def write_input(tmp_path, features):
+    (tmp_path / "in.geojson").write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+
+
+def test_make_centroids_reuses_and_invalidates(tmp_path, capsys):
+    write_input(tmp_path, [feature("MI01", square(0, 0)), feature("MI02", square(5, 5))])
+    assert "0 reused, 2 computed" in run_centroids(tmp_path, capsys)
+    assert "unchanged since last run" in run_centroids(tmp_path, capsys)
+
+    # An output option change rewrites the file but reuses every centroid.
+    assert "2 reused, 0 computed" in run_centroids(tmp_path, capsys, "--precision", "3")
+
+    # An input change recomputes only the changed feature.
+    write_input(tmp_path, [feature("MI01", square(0, 0)), feature("MI02", square(6, 6))])
+    assert "1 reused, 1 computed" in run_centroids(tmp_path, capsys, "--precision", "3")
+    points = json.loads((tmp_path / "out.geojson").read_text())["features"]
+    assert sorted(p["geometry"]["coordinates"] for p in points) == [[0.5, 0.5], [6.5, 6.5]]
+
+    # A corrupt cache is rebuilt.
+    (tmp_path / "out.cache.json").write_text("{not json")
+    assert "0 reused, 2 computed" in run_centroids(tmp_path, capsys, "--precision", "3")
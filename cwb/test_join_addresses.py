@@ -0,0 +1,19 @@
+"""join_addresses rejects bad input before touching the output."""
+
+import pytest
+
+from join_addresses import main
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "no header row"),
+    ("name,lat,lon,served_pwsid\na,42.9,-85.6,MI01\n", "served_pwsid"),
+    ("name,where\na,here\n", "No lat column"),
+])
+def test_bad_input_leaves_output_alone(tmp_path, text, message):
+    source, output = tmp_path / "in.csv", tmp_path / "out.csv"
+    source.write_text(text)
+    output.write_text("previous results\n")
+    with pytest.raises(SystemExit, match=message):
+        main([str(source), str(output)])
+    assert output.read_text() == "previous results\n"
@@ -0,0 +1,52 @@
+"""The packed R-tree search in make_index agrees with a brute-force scan."""
+
+import numpy as np
+import pytest
+
+from make_index import build_index, search
+
+
+def square_features(count, seed=0):
+    rng = np.random.default_rng(seed)
+    features = []
+    for i, (x, y, size) in enumerate(zip(
+        rng.uniform(-90, -82, count), rng.uniform(41, 47, count), rng.uniform(0.01, 0.3, count)
+    )):
+        ring = [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+        features.append({
+            "type": "Feature",
+            "properties": {"PWSID": f"MI{i:07d}"},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+    return features
+
+
+def brute_force(index, bbox):
+    boxes = np.array(index["boxes"]).reshape(-1, 4)
+    return np.flatnonzero(
+        (boxes[:, 0] <= bbox[2]) & (boxes[:, 1] <= bbox[3])
+        & (boxes[:, 2] >= bbox[0]) & (boxes[:, 3] >= bbox[1])
+    ).tolist()
+
+
+@pytest.mark.parametrize("node_size", [4, 16])
+@pytest.mark.parametrize("bbox", [
+    (-83.30, 42.25, -82.90, 42.45),
+    (-88.0, 44.0, -86.0, 46.0),
+    (-100.0, 30.0, -70.0, 50.0),
+    (0.0, 0.0, 1.0, 1.0),
+])
+def test_search_matches_brute_force(node_size, bbox):
+    index = build_index(square_features(600), node_size)
+    assert sorted(search(index, bbox)) == brute_force(index, bbox)
+
+
+def test_rounded_boxes_contain_features():
+    features = square_features(200, seed=1)
+    index = build_index(features, precision=2)
+    boxes = np.array(index["boxes"]).reshape(-1, 4)
+    by_id = {feature["properties"]["PWSID"]: feature for feature in features}
+    for pwsid, (minx, miny, maxx, maxy) in zip(index["ids"], boxes):
+        ring = np.array(by_id[pwsid]["geometry"]["coordinates"][0])
+        assert minx <= ring[:, 0].min() and maxx >= ring[:, 0].max()
+        assert miny <= ring[:, 1].min() and maxy >= ring[:, 1].max()
@@ -0,0 +1,68 @@
+"""make_topojson output decodes back to its input, sharing common borders."""
+
+from make_topojson import build_topology
+
+LEFT = [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+RIGHT = [[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]
+
+
+def feature(pwsid, ring):
+    return {
+        "type": "Feature",
+        "properties": {"PWSID": pwsid},
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+    }
+
+
+def decode_arcs(topology):
+    """Undo delta encoding and quantization."""
+    (kx, ky), (tx, ty) = topology["transform"]["scale"], topology["transform"]["translate"]
+    decoded = []
+    for arc in topology["arcs"]:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x, y = x + dx, y + dy
+            points.append((x * kx + tx, y * ky + ty))
+        decoded.append(points)
+    return decoded
+
+
+def decode_ring(arc_indices, arcs):
+    ring = []
+    for index in arc_indices:
+        points = arcs[index] if index >= 0 else arcs[~index][::-1]
+        ring.extend(points if not ring else points[1:])
+    return ring
+
+
+def same_ring(decoded, original):
+    """Equal closed rings, up to the starting vertex; direction must match."""
+    if decoded[0] != decoded[-1]:
+        return False
+    decoded, original = decoded[:-1], [tuple(point) for point in original[:-1]]
+    start = decoded.index(original[0])
+    return decoded[start:] + decoded[:start] == original
+
+
+def test_shared_border_is_one_arc_and_rings_round_trip():
+    # Quantization 5 puts every input vertex exactly on the grid.
+    topology, arcs = build_topology([feature("MI01", LEFT), feature("MI02", RIGHT)], quantization=5)
+    left, right = topology["objects"]["water_systems"]["geometries"]
+    assert left["type"] == right["type"] == "Polygon"
+    assert left["properties"]["PWSID"] == "MI01"
+
+    def used(geometry):
+        return {index if index >= 0 else ~index: index >= 0 for index in geometry["arcs"][0]}
+
+    left_arcs, right_arcs = used(left), used(right)
+    shared = set(left_arcs) & set(right_arcs)
+    assert len(shared) == 1 and len(topology["arcs"]) == 3 and arcs.shared == 1
+    (arc,) = shared
+    # Traversed in opposite directions by the two neighbours.
+    assert left_arcs[arc] != right_arcs[arc]
+
+    decoded = decode_arcs(topology)
+    assert sorted(decoded[arc]) == [(1.0, 0.0), (1.0, 1.0)]
+    assert same_ring(decode_ring(left["arcs"][0], decoded), LEFT)
+    assert same_ring(decode_ring(right["arcs"][0], decoded), RIGHT)
@@ -0,0 +1,49 @@
+"""ServiceAreaIndex matches points on boundaries and loads GeoParquet like GeoJSON."""
+
+import json
+
+import numpy as np
+import pytest
+import shapely
+
+from service_area_lookup import ServiceAreaIndex, read_geojson, read_parquet
+
+BIG = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+SMALL = [[1, 1], [2, 1], [2, 2], [1, 2], [1, 1]]
+# Self-intersecting; repaired on load.
+BOWTIE = [[10, 0], [12, 2], [12, 0], [10, 2], [10, 0]]
+
+
+def write_geojson(path):
+    features = [
+        {"type": "Feature", "properties": {"PWSID": pwsid, "PWS_Name": name},
+         "geometry": {"type": "Polygon", "coordinates": [ring]}}
+        for pwsid, name, ring in [("MI01", "Big", BIG), ("MI02", "Small", SMALL), ("MI03", "Bowtie", BOWTIE)]
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return str(path)
+
+
+def test_locate_includes_boundaries_and_prefers_smallest(tmp_path):
+    index = ServiceAreaIndex(*read_geojson(write_geojson(tmp_path / "areas.geojson")))
+    lats = [0.5, 1.5, 1.0, 0.0, 4.0, 9.0, 1.0]
+    lons = [0.5, 1.5, 1.5, 2.0, 4.0, 9.0, 11.5]
+    found = [index.pwsids[i] if i >= 0 else None for i in index.locate(lats, lons)]
+    # Inside, nested, on the small area's edge, on the big area's edge and
+    # corner, outside everything, inside the repaired bowtie.
+    assert found == ["MI01", "MI02", "MI02", "MI01", "MI01", None, "MI03"]
+
+
+def test_parquet_loads_like_geojson(tmp_path):
+    gpd = pytest.importorskip("geopandas")
+    geojson = write_geojson(tmp_path / "areas.geojson")
+    parquet = str(tmp_path / "areas.parquet")
+    gpd.read_file(geojson).to_parquet(parquet)
+
+    from_json, from_parquet = read_geojson(geojson), read_parquet(parquet)
+    assert list(from_parquet[1]) == list(from_json[1])
+    assert list(from_parquet[2]) == list(from_json[2])
+    assert shapely.equals(from_parquet[0], from_json[0]).all()
+    index = ServiceAreaIndex(*from_parquet)
+    assert np.array_equal(index.locate([1.5], [1.5]), [1])
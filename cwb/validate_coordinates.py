@@ -0,0 +1,168 @@
+"""Check lead-data.csv coordinates against each system's own service area.
+
+``lead-data.csv`` carries a Latitude/Longitude per PWSID that is
+maintained separately from ``mi_cwb.geojson``. All points are tested in
+one vectorized STRtree ``covered_by`` query; a point passes when one of
+the polygons covering it (boundary included) has the row's own PWSID. For points outside their
+own polygon the report gives the distance to that polygon's boundary,
+the system whose area the point falls in instead (if any), and a
+replacement coordinate: the first of the ``--replacements`` point files
+(centroids, then label points) whose point lies inside the polygon.
+Many lead-data coordinates are themselves area centroids, which can fall
+outside concave service areas, so the label points are the usual pick.
+
+Statuses: ``inside``, ``outside``, ``no_boundary`` (the PWSID has no
+service-area polygon) and ``no_coordinates``.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+from common import haversine
+from geojson_stream import iter_features
+from lead_data import LEAD_DATA_CSV
+from service_area_lookup import INPUT_GEOJSON, INPUT_PARQUET, ServiceAreaIndex
+
+# Tried in order; files that have not been built are skipped.
+REPLACEMENT_FILES = ["mi_cwb_centroids.geojson", "mi_cwb_labels.geojson"]
+OUTPUT_CSV = "coordinate_check.csv"
+FIELDS = [
+    "pwsid", "name", "status", "latitude", "longitude", "distance_m",
+    "falls_in_pwsid", "replacement_latitude", "replacement_longitude",
+]
+
+
+def load_points(path):
+    """Map PWSID to the ``(lon, lat)`` of its feature in a point GeoJSON file."""
+    return {
+        feature["properties"]["PWSID"]: tuple(feature["geometry"]["coordinates"])
+        for feature in iter_features(path, ["PWSID"])
+    }
+
+
+def pick_replacements(index, own, pwsids, candidates):
+    """First candidate point per record that lies inside its own polygon, else None."""
+    chosen = [None] * len(pwsids)
+    for points in candidates:
+        todo = [i for i in range(len(pwsids))
+                if chosen[i] is None and own[i] >= 0 and pwsids[i] in points]
+        if not todo:
+            continue
+        xy = np.array([points[pwsids[i]] for i in todo], dtype=float)
+        inside = shapely.intersects_xy(index.geometries[own[todo]], xy[:, 0], xy[:, 1])
+        for i, ok, point in zip(todo, inside, xy.tolist()):
+            if ok:
+                chosen[i] = point
+    return chosen
+
+
+def validate(index, records, candidates):
+    """Return one result dict per lead-data record, in file order.
+
+    ``candidates`` is a list of PWSID -> (lon, lat) maps to take replacement
+    coordinates from.
+    """
+    pwsids = np.array(list(records), dtype=object)
+    lats = np.array([records[p]["latitude"] or np.nan for p in pwsids], dtype=float)
+    lons = np.array([records[p]["longitude"] or np.nan for p in pwsids], dtype=float)
+    position = {pwsid: i for i, pwsid in enumerate(index.pwsids)}
+    own = np.array([position.get(p, -1) for p in pwsids], dtype=np.int64)
+    has_point = ~(np.isnan(lats) | np.isnan(lons))
+
+    points = shapely.points(lons, lats)
+    point_idx, area_idx = index.tree.query(points, predicate="covered_by")
+    inside = np.zeros(len(pwsids), dtype=bool)
+    inside[point_idx[index.pwsids[area_idx] == pwsids[point_idx]]] = True
+    # Smallest other area containing each point, for the report.
+    falls_in = index.locate(lats, lons)
+
+    outside = has_point & (own >= 0) & ~inside
+    distance = np.full(len(pwsids), np.nan)
+    if outside.any():
+        nearest = shapely.get_coordinates(
+            shapely.shortest_line(index.geometries[own[outside]], points[outside])
+        ).reshape(-1, 2, 2)
+        distance[outside] = haversine(nearest[:, 0, 0], nearest[:, 0, 1],
+                                      nearest[:, 1, 0], nearest[:, 1, 1])
+
+    replacements = pick_replacements(index, own, pwsids, candidates)
+    results = []
+    for i, pwsid in enumerate(pwsids):
+        if not has_point[i]:
+            status = "no_coordinates"
+        elif own[i] < 0:
+            status = "no_boundary"
+        else:
+            status = "inside" if inside[i] else "outside"
+        replacement = replacements[i] if status in ("outside", "no_coordinates") else None
+        results.append({
+            "pwsid": pwsid,
+            "name": records[pwsid]["name"],
+            "status": status,
+            "latitude": records[pwsid]["latitude"],
+            "longitude": records[pwsid]["longitude"],
+            "distance_m": round(float(distance[i])) if outside[i] else "",
+            "falls_in_pwsid": index.pwsids[falls_in[i]] if outside[i] and falls_in[i] >= 0 else "",
+            "replacement_latitude": round(replacement[1], 6) if replacement else "",
+            "replacement_longitude": round(replacement[0], 6) if replacement else "",
+        })
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validate lead-data.csv coordinates.")
+    parser.add_argument(
+        "--boundaries",
+        help=f"service areas (default: {INPUT_PARQUET} if up to date, else {INPUT_GEOJSON})",
+    )
+    parser.add_argument("--lead-data", default=LEAD_DATA_CSV)
+    parser.add_argument(
+        "--replacements",
+        nargs="+",
+        default=REPLACEMENT_FILES,
+        help="point files to take replacement coordinates from, in order of preference",
+    )
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument(
+        "--fail-on-outside",
+        action="store_true",
+        help="exit with status 1 if any point lies outside its own service area",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    index = ServiceAreaIndex.from_files(args.boundaries, args.lead_data)
+    records = index.lead_records
+    candidates = [load_points(path) for path in args.replacements if os.path.exists(path)]
+    print(f"Loaded {len(records)} lead-data records and {len(index.pwsids)} service areas "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    results = validate(index, records, candidates)
+    elapsed = (time.perf_counter() - start) * 1000
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(f"Validated {len(results)} coordinates in {elapsed:.0f}ms: "
+          + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(r for r in results if r["status"] != "inside")
+    print(f"Wrote {len(results) - counts.get('inside', 0)} flagged systems to {args.output}")
+    if args.fail_on_outside and counts.get("outside"):
+        sys.exit(1)
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Monitor the Michigan lead data sources for updates.
+
+Run from the repository root with ``PYTHONPATH=scripts python -m data_monitor``;
+the GitHub workflow ``check-data-updates.yml`` does this daily and opens an
+issue when a source changed.
+"""
+
+from .engine import run_checks
+from .merkle import MerkleTree
+from .session import Fetcher, FetchError, HostLimiter, open_session
+from .sources import SOURCES, SocrataDataset, Source, WebPage
+from .state import STATE_FILE, load_state, save_state
+
+__all__ = [
+    "run_checks",
+    "MerkleTree",
+    "Fetcher",
+    "FetchError",
+    "HostLimiter",
+    "open_session",
+    "SOURCES",
+    "SocrataDataset",
+    "Source",
+    "WebPage",
+    "STATE_FILE",
+    "load_state",
+    "save_state",
+]
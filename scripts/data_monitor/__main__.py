@@ -0,0 +1,139 @@
+"""Command-line entry point: ``python -m data_monitor`` (with ``scripts/`` on the path)."""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from .engine import run_checks
+from .sources import SOURCES
+from .state import STATE_FILE, load_state, save_state
+
+# A source failing this many runs in a row gets a monitor alert issue.
+FAILURE_ALERT_RUNS = 3
+
+
+def detect_changes(sources, prev_state, current_state):
+    changes = []
+    for source in sources:
+        current = current_state[source.key]
+        if current["success"]:
+            changes.extend(source.changes(prev_state.get(source.key, {}), current))
+    return changes
+
+
+def detect_alerts(sources, current_state):
+    """Problems with the monitor itself: sources that keep failing, and warnings."""
+    alerts = []
+    for source in sources:
+        current = current_state[source.key]
+        alert = {"source": source.name, "url": source.url}
+        if current.get("consecutive_failures", 0) >= FAILURE_ALERT_RUNS:
+            alerts.append({
+                **alert,
+                "type": "Check failing",
+                "details": (
+                    f"Failed {current['consecutive_failures']} runs in a row; last: "
+                    f"{current.get('failure', 'error')}: {current.get('error')}"
+                ),
+            })
+        if current.get("warning"):
+            alerts.append({**alert, "type": "Check warning", "details": current["warning"]})
+    return alerts
+
+
+def print_result(index, total, source, result):
+    print(f"\n[{index}/{total}] {source.name} ({result['elapsed']:.2f}s)")
+    if not result["success"]:
+        attempts = f" after {result['attempts']} attempts" if result.get("attempts", 1) > 1 else ""
+        print(f"  ✗ {result.get('failure', 'error')}{attempts}: {result.get('error')}")
+        if result["consecutive_failures"] > 1:
+            print(f"  ✗ Failed {result['consecutive_failures']} runs in a row")
+        return
+    if result.get("not_modified"):
+        print("  ✓ Not modified since last check (304)")
+    if "record_count" in result:
+        print(f"  ✓ Record count: {result['record_count']}")
+    if "records_fetched" in result:
+        kind = "Full sync" if result["full_sync"] else "Synced"
+        print(
+            f"  ✓ {kind}: {result['records_fetched']} records fetched "
+            f"({result['records_added']} added, {result['records_updated']} updated, "
+            f"{result['records_removed']} removed)"
+        )
+    print(f"  ✓ Content hash: {result['content_hash'][:12]}...")
+    if "data_links_count" in result:
+        print(f"  ✓ Data file links found: {result['data_links_count']}")
+    if result.get("warning"):
+        print(f"  ⚠ {result['warning']}")
+
+
+def format_systems(systems, limit=10):
+    listed = ", ".join(f"{system['id'] or '(none)'} ({system['change']})" for system in systems[:limit])
+    if len(systems) > limit:
+        listed += f", and {len(systems) - limit} more"
+    return listed
+
+
+def write_github_output(changes, changes_json, alerts):
+    with open(os.environ.get("GITHUB_OUTPUT", os.devnull), "a") as f:
+        # Always written: the alert step closes its issue once this is empty.
+        f.write(f"alerts_json={json.dumps(alerts)}\n")
+        if changes:
+            f.write("changes_detected=true\n")
+            f.write(f"changes_count={len(changes)}\n")
+            # json.dumps output is a single line, so it needs no escaping;
+            # the workflow reads it back verbatim from the environment.
+            f.write(f"changes_json={changes_json}\n")
+        else:
+            f.write("changes_detected=false\n")
+            f.write("changes_count=0\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the lead data sources for updates.")
+    parser.add_argument("--state", default=STATE_FILE, help="state file from the previous run")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("=" * 60)
+    print(f"Data Update Check - {datetime.now().isoformat()}")
+    print("=" * 60)
+
+    prev_state = load_state(args.state)
+    start = time.monotonic()
+    current_state = asyncio.run(run_checks(SOURCES, prev_state))
+    elapsed = time.monotonic() - start
+    for index, source in enumerate(SOURCES, 1):
+        print_result(index, len(SOURCES), source, current_state[source.key])
+    print(f"\nChecked {len(SOURCES)} sources in {elapsed:.2f}s")
+
+    changes = detect_changes(SOURCES, prev_state, current_state)
+    alerts = detect_alerts(SOURCES, current_state)
+    current_state["last_check"] = datetime.now().isoformat()
+    save_state(current_state, args.state)
+
+    print("\n" + "=" * 60)
+    if changes:
+        print(f"🚨 CHANGES DETECTED: {len(changes)} update(s) found!")
+        for i, change in enumerate(changes, 1):
+            print(f"\n  [{i}] {change['source']}")
+            print(f"      Type: {change['type']}")
+            print(f"      Details: {change['details']}")
+            print(f"      URL: {change['url']}")
+            if change.get("systems"):
+                print(f"      Systems: {format_systems(change['systems'])}")
+    else:
+        print("✓ No changes detected. All data sources unchanged.")
+    for alert in alerts:
+        print(f"\n  ⚠ {alert['source']}: {alert['type']}: {alert['details']}")
+    write_github_output(changes, json.dumps(changes), alerts)
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
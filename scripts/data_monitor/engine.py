@@ -0,0 +1,57 @@
+"""Concurrent check engine for the data monitor.
+
+All sources are checked at once on one event loop, sharing one
+``Fetcher`` (see ``session.py``). Each source runs under its own time
+budget; a source that runs out of time or fails is recorded as a
+classified failure and does not hold up the others.
+"""
+
+import asyncio
+import time
+
+from .session import Fetcher, FetchError, open_session
+from .state import data_fields
+
+
+def failure_result(previous, failure, error, **details):
+    """A failed result that keeps the last good data from ``previous`` and counts failed runs."""
+    return {
+        "success": False,
+        **data_fields(previous),
+        "failure": failure,
+        "error": error,
+        **details,
+        "consecutive_failures": previous.get("consecutive_failures", 0) + 1,
+    }
+
+
+async def run_source(source, fetcher, previous):
+    """Check one source within its time budget; failures become error results."""
+    start = time.monotonic()
+    try:
+        result = await asyncio.wait_for(source.check(fetcher, previous), source.budget)
+    except asyncio.TimeoutError:
+        result = failure_result(previous, "timeout", f"Time budget of {source.budget:g}s exceeded")
+    except FetchError as e:
+        details = {"attempts": e.attempts}
+        if e.status is not None:
+            details["status"] = e.status
+        result = failure_result(previous, e.failure, str(e), **details)
+    except ValueError as e:
+        result = failure_result(previous, "invalid_response", str(e))
+    except Exception as e:
+        result = failure_result(previous, "error", str(e))
+    result.setdefault("url", source.url)
+    result["elapsed"] = round(time.monotonic() - start, 2)
+    return result
+
+
+async def run_checks(sources, prev_state=None, host_limits=None):
+    """Check every source concurrently and return ``{source.key: result}``."""
+    prev_state = prev_state or {}
+    async with open_session(host_limits) as session:
+        fetcher = Fetcher(session, host_limits)
+        results = await asyncio.gather(*(
+            run_source(source, fetcher, prev_state.get(source.key, {})) for source in sources
+        ))
+    return {source.key: result for source, result in zip(sources, results)}
@@ -0,0 +1,97 @@
+"""Merkle tree over per-bucket record hashes.
+
+Records are grouped into buckets (one per PWSID for the lead data). A
+bucket's hash covers the sorted hashes of its records' content, not
+their ids: Socrata assigns new row ids when a dataset is replaced, and
+re-keyed but identical rows must not look like a change. Buckets hang off a
+fixed-shape hex trie: a bucket sits under the leaf named by the first
+``DEPTH`` hex digits of its key's digest, and every node hashes its
+children. The shape depends only on bucket keys, so adding a system
+does not shift any other node.
+
+``update`` rehashes only the paths above changed buckets. ``diff``
+walks down from the root into nodes whose hashes differ. Both cost
+O(changed buckets x DEPTH x 16), not a pass over the whole dataset.
+"""
+
+import hashlib
+
+DEPTH = 2  # 16 internal nodes, 256 leaves
+HEX = "0123456789abcdef"
+
+
+def digest(text):
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def leaf_of(bucket):
+    return digest(bucket)[:DEPTH]
+
+
+def bucket_hash(record_hashes):
+    """Hash of one bucket from its records' content hashes, duplicates included."""
+    return digest("".join(f"{record_hash}\n" for record_hash in sorted(record_hashes)))
+
+
+class MerkleTree:
+    """Bucket hashes and the trie of node hashes above them; ``""`` is the root."""
+
+    def __init__(self, buckets=None, nodes=None):
+        self.buckets = dict(buckets or {})
+        self.nodes = dict(nodes or {})
+        self.leaves = {}
+        for bucket in self.buckets:
+            self.leaves.setdefault(leaf_of(bucket), set()).add(bucket)
+
+    @property
+    def root(self):
+        return self.nodes.get("", digest(""))
+
+    def copy(self):
+        return MerkleTree(self.buckets, self.nodes)
+
+    def update(self, changes):
+        """Apply ``{bucket: hash, or None to remove}``; return the rehashed node paths."""
+        dirty = set()
+        for bucket, value in changes.items():
+            leaf = leaf_of(bucket)
+            members = self.leaves.setdefault(leaf, set())
+            if value is None:
+                self.buckets.pop(bucket, None)
+                members.discard(bucket)
+            else:
+                self.buckets[bucket] = value
+                members.add(bucket)
+            dirty.add(leaf)
+        for leaf in dirty:
+            self._rehash(leaf, sorted(f"{b}:{self.buckets[b]}\n" for b in self.leaves[leaf]))
+            if not self.leaves[leaf]:
+                del self.leaves[leaf]
+        level = dirty
+        for _ in range(DEPTH):
+            level = {path[:-1] for path in level}
+            for path in level:
+                self._rehash(path, [f"{d}:{self.nodes[path + d]}\n" for d in HEX if path + d in self.nodes])
+            dirty |= level
+        return dirty
+
+    def _rehash(self, path, lines):
+        if lines:
+            self.nodes[path] = digest("".join(lines))
+        else:
+            self.nodes.pop(path, None)
+
+    def diff(self, other):
+        """Buckets whose hash differs from ``other``'s, visiting only differing nodes."""
+        changed = []
+        stack = [""]
+        while stack:
+            path = stack.pop()
+            if self.nodes.get(path) == other.nodes.get(path):
+                continue
+            if len(path) < DEPTH:
+                stack.extend(path + d for d in HEX)
+                continue
+            members = self.leaves.get(path, set()) | other.leaves.get(path, set())
+            changed.extend(b for b in members if self.buckets.get(b) != other.buckets.get(b))
+        return sorted(changed)
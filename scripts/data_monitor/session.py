@@ -0,0 +1,166 @@
+"""Shared HTTP session layer for the data monitor.
+
+Every request goes through one ``Fetcher``. It owns a single aiohttp
+session whose connector keeps connections to each host alive and pooled
+across sources. It also holds one ``HostLimiter`` per host, so no host
+sees more than its allowed concurrency or request rate however many
+sources point at it. Transient failures (connection errors, timeouts,
+429, 5xx and the 403s the michigan.gov front end returns to bursts) are
+retried a bounded number of times with jittered exponential backoff.
+Anything still failing is raised as a ``FetchError`` carrying a failure
+class for the state file.
+"""
+
+import asyncio
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import aiohttp
+
+USER_AGENT = "Mozilla/5.0 (compatible; DataMonitor/1.0; +https://planetdetroit.org)"
+
+# host: (concurrent requests, minimum seconds between request starts)
+HOST_LIMITS = {
+    "www.michigan.gov": (2, 1.0),
+    "data.michigan.gov": (4, 0.2),
+}
+DEFAULT_HOST_LIMIT = (4, 0.0)
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 1.0  # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_CAP = 10.0
+RETRY_STATUSES = {
+    HTTPStatus.FORBIDDEN,
+    HTTPStatus.REQUEST_TIMEOUT,
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=20)
+
+
+class FetchError(Exception):
+    """A request that failed after all retries.
+
+    ``failure`` classifies it for the state file: ``forbidden``,
+    ``rate_limited``, ``not_found``, ``client_error``, ``server_error``,
+    ``timeout`` or ``connection``.
+    """
+
+    def __init__(self, url, failure, message, status=None, attempts=1):
+        super().__init__(message)
+        self.url = url
+        self.failure = failure
+        self.status = status
+        self.attempts = attempts
+
+
+def classify_status(status):
+    if status == HTTPStatus.FORBIDDEN:
+        return "forbidden"
+    if status == HTTPStatus.TOO_MANY_REQUESTS:
+        return "rate_limited"
+    if status == HTTPStatus.NOT_FOUND:
+        return "not_found"
+    if status >= 500:
+        return "server_error"
+    return "client_error"
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, honouring a numeric ``Retry-After``."""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class HostLimiter:
+    """Bound concurrency and request rate for one host."""
+
+    def __init__(self, concurrency, interval):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self.semaphore:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_start - now
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = max(now, self._next_start) + self.interval
+            yield
+
+
+def open_session(host_limits=None):
+    """Return a session whose connector pools keep-alive connections per host."""
+    host_limits = HOST_LIMITS if host_limits is None else host_limits
+    per_host = max([DEFAULT_HOST_LIMIT[0], *(limit for limit, _ in host_limits.values())])
+    connector = aiohttp.TCPConnector(limit_per_host=per_host, keepalive_timeout=60, ttl_dns_cache=300)
+    return aiohttp.ClientSession(
+        connector=connector, headers={"User-Agent": USER_AGENT}, timeout=REQUEST_TIMEOUT
+    )
+
+
+class Fetcher:
+    """Issue GET requests through the shared session, host limits and retries."""
+
+    def __init__(self, session, host_limits=None, max_attempts=MAX_ATTEMPTS):
+        self.session = session
+        self.host_limits = HOST_LIMITS if host_limits is None else host_limits
+        self.max_attempts = max_attempts
+        self._limiters = {}
+
+    def limiter(self, url):
+        host = urlsplit(url).hostname
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(*self.host_limits.get(host, DEFAULT_HOST_LIMIT))
+        return self._limiters[host]
+
+    async def get(self, url, headers=None):
+        """Return ``(status, response headers, body bytes)``; raise ``FetchError``.
+
+        A 304 is not an error; its body is empty.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            retry_after = None
+            try:
+                # Backoff sleeps happen outside the slot, so other requests
+                # to the host can proceed meanwhile.
+                async with self.limiter(url).slot():
+                    async with self.session.get(url, headers=headers) as resp:
+                        body = await resp.read()
+                        if resp.status < 400:
+                            return resp.status, resp.headers, body
+                        retry_after = resp.headers.get("Retry-After")
+                        error = FetchError(
+                            url, classify_status(resp.status),
+                            f"{resp.status} {resp.reason} for url: {url}", resp.status, attempt,
+                        )
+                        retryable = resp.status in RETRY_STATUSES
+            except asyncio.TimeoutError:
+                error = FetchError(url, "timeout", f"Request timed out: {url}", attempts=attempt)
+                retryable = True
+            except aiohttp.ClientError as e:
+                error = FetchError(url, "connection", f"{e.__class__.__name__}: {e}", attempts=attempt)
+                retryable = True
+            if not retryable or attempt == self.max_attempts:
+                raise error
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+    async def get_json(self, url, headers=None):
+        _, _, body = await self.get(url, headers)
+        return json.loads(body)
+
+    async def get_text(self, url, headers=None):
+        _, _, body = await self.get(url, headers)
+        return body.decode("utf-8", errors="replace")
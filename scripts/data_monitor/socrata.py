@@ -0,0 +1,313 @@
+"""Incremental sync of a Socrata dataset into a local SQLite store.
+
+Each row is stored by its Socrata row id (``:id``) with a hash of its
+user-visible fields. A sync asks only for rows whose ``:updated_at`` is
+after the stored watermark, fetches those pages concurrently and upserts
+them. Rows stamped exactly at the watermark are fetched again only when
+the dataset has more of them than the store, i.e. one arrived after the
+last sync in the same instant. A row re-sent with the same hash is not
+counted as changed, so rows touched without an edit do not show up as
+changes. Deleted rows never show up in an ``:updated_at`` query. When the stored row count no longer matches the dataset's, the
+full id list is fetched and the missing ids are removed.
+
+Rows are bucketed by a field (PWSID for the lead data) and the store
+keeps a Merkle tree of bucket hashes (see ``merkle.py``). A sync rehashes
+only the buckets its delta touched. Diffing the old and new trees then
+names the systems whose results changed.
+
+The watermark lives in the store itself. A missing or empty store
+therefore falls back to a full sync instead of trusting a watermark
+from the state file.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from .merkle import MerkleTree, bucket_hash, digest
+from .state import STORE_DIR
+
+PAGE_SIZE = 1000
+ID_PAGE_SIZE = 50000
+# Socrata system fields; excluded from row hashes so a touch without an
+# edit does not count as a change.
+SYSTEM_FIELDS = (":id", ":created_at", ":updated_at", ":version")
+
+# Bumped when the tables or bucket hashes change; an older store is
+# dropped and rebuilt by a full sync.
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_bucket ON records (bucket);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+TABLES = ("records", "buckets", "nodes", "meta")
+
+
+def row_hash(record):
+    fields = {key: value for key, value in record.items() if key not in SYSTEM_FIELDS}
+    return digest(json.dumps(fields, sort_keys=True))
+
+
+def soql_timestamp(value):
+    """A ``:updated_at`` value as a SoQL floating timestamp literal."""
+    return value.rstrip("Z")
+
+
+class RecordStore:
+    """SQLite rows of one dataset, keyed by Socrata row id, with their Merkle tree.
+
+    Methods are blocking; the sync runs them in a worker thread.
+    """
+
+    def __init__(self, path, bucket_field):
+        self.path = path
+        self.bucket_field = bucket_field
+
+    @contextmanager
+    def connect(self):
+        """Open the store in one transaction, committed on success, then close it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript("".join(f"DROP TABLE IF EXISTS {table};" for table in TABLES))
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def bucket_of(self, record):
+        return str(record.get(self.bucket_field) or "")
+
+    def bucket_field_warning(self, records):
+        """A warning if the first page has no ``bucket_field`` at all, else None.
+
+        Socrata leaves null fields out of a row, so single rows may lack
+        it; a page where no row has it means the field name is wrong.
+        Those rows all land in the ``""`` bucket, so the root still
+        covers the whole dataset but no longer names systems.
+        """
+        page = records[:PAGE_SIZE]
+        if not page or any(self.bucket_field in record for record in page):
+            return None
+        columns = sorted({key for record in page for key in record if not key.startswith(":")})
+        return (
+            f"Bucket field {self.bucket_field!r} not found in dataset rows; changes are "
+            f"reported for the whole dataset. Columns are: {', '.join(columns)}"
+        )
+
+    def watermark(self):
+        with self.connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return row[0] if row else None
+
+    def count_at(self, updated_at, records=()):
+        """The number of stored rows updated at exactly ``updated_at`` and not re-sent in ``records``."""
+        with self.connect() as conn:
+            stored = {row[0] for row in conn.execute("SELECT id FROM records WHERE updated_at = ?", (updated_at,))}
+        return len(stored - {record[":id"] for record in records})
+
+    def count_after(self, records):
+        """The row count once ``records`` are upserted."""
+        with self.connect() as conn:
+            stored = {row[0] for row in conn.execute("SELECT id FROM records")}
+        return len(stored | {record[":id"] for record in records})
+
+    def apply(self, records, live_ids=None):
+        """Upsert ``records``, drop ids missing from ``live_ids`` and update the tree.
+
+        Rows, tree and watermark change in one transaction, so an
+        interrupted sync leaves the store as it was. Returns the
+        ``added``, ``updated`` and ``removed`` row ids, the ``old`` and
+        new ``tree`` and the new ``watermark``.
+        """
+        with self.connect() as conn:
+            existing = {
+                record_id: (record_hash, bucket)
+                for record_id, record_hash, bucket in conn.execute("SELECT id, hash, bucket FROM records")
+            }
+            added, updated, dirty, rows, touched = [], [], set(), [], []
+            for record in records:
+                record_id, record_hash, bucket = record[":id"], row_hash(record), self.bucket_of(record)
+                if record_id not in existing:
+                    added.append(record_id)
+                elif existing[record_id] != (record_hash, bucket):
+                    updated.append(record_id)
+                    dirty.add(existing[record_id][1])
+                else:
+                    # Unchanged, but keep ``updated_at`` current for ``count_at``.
+                    touched.append((record[":updated_at"], record_id))
+                    continue
+                dirty.add(bucket)
+                rows.append((
+                    record_id, bucket, record[":updated_at"], record_hash, json.dumps(record, sort_keys=True)
+                ))
+            conn.executemany(
+                "INSERT INTO records (id, bucket, updated_at, hash, record) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET bucket = excluded.bucket, updated_at = excluded.updated_at, "
+                "hash = excluded.hash, record = excluded.record",
+                rows,
+            )
+            conn.executemany("UPDATE records SET updated_at = ? WHERE id = ?", touched)
+            removed = []
+            if live_ids is not None:
+                removed = sorted(set(existing) - set(live_ids))
+                dirty.update(existing[record_id][1] for record_id in removed)
+                conn.executemany("DELETE FROM records WHERE id = ?", [(i,) for i in removed])
+            if records:
+                watermark = max(record[":updated_at"] for record in records)
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('watermark', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+                    (watermark,),
+                )
+            row = conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+
+            old = MerkleTree(
+                conn.execute("SELECT bucket, hash FROM buckets"), conn.execute("SELECT path, hash FROM nodes")
+            )
+            tree = old.copy()
+            changes = {bucket: None for bucket in dirty}
+            members = {}
+            query = f"SELECT bucket, hash FROM records WHERE bucket IN ({','.join('?' * len(dirty))})"
+            for bucket, record_hash in conn.execute(query, sorted(dirty)):
+                members.setdefault(bucket, []).append(record_hash)
+            changes.update({bucket: bucket_hash(hashes) for bucket, hashes in members.items()})
+            paths = tree.update(changes)
+            conn.executemany(
+                "DELETE FROM buckets WHERE bucket = ?", [(b,) for b, h in changes.items() if h is None]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (bucket, hash) VALUES (?, ?)",
+                [(b, h) for b, h in changes.items() if h is not None],
+            )
+            conn.executemany("DELETE FROM nodes WHERE path = ?", [(p,) for p in paths if p not in tree.nodes])
+            conn.executemany(
+                "INSERT OR REPLACE INTO nodes (path, hash) VALUES (?, ?)",
+                [(p, tree.nodes[p]) for p in paths if p in tree.nodes],
+            )
+        return {
+            "added": added, "updated": updated, "removed": removed, "old": old, "tree": tree,
+            "watermark": row[0] if row else None,
+        }
+
+
+class SocrataSync:
+    """Sync one dataset's resource endpoint into a ``RecordStore``."""
+
+    def __init__(self, resource_url, store):
+        self.resource_url = resource_url
+        self.store = store
+
+    def query_url(self, **params):
+        return f"{self.resource_url}?{urlencode({f'${key}': value for key, value in params.items()})}"
+
+    async def count(self, fetcher, where=None, headers=None):
+        """Return ``(status, response headers, row count)``; the count is None on a 304."""
+        params = {"select": "count(*)"}
+        if where:
+            params["where"] = where
+        status, resp_headers, body = await fetcher.get(self.query_url(**params), headers)
+        if not body:
+            return status, resp_headers, None
+        data = json.loads(body)
+        return status, resp_headers, int(data[0]["count"]) if data else 0
+
+    async def fetch_rows(self, fetcher, total, where=None):
+        """Fetch ``total`` rows matching ``where`` as concurrent ``:id``-ordered pages."""
+        params = {"select": ":*, *", "order": ":id", "limit": PAGE_SIZE}
+        if where:
+            params["where"] = where
+        pages = await asyncio.gather(*(
+            fetcher.get_json(self.query_url(**params, offset=offset))
+            for offset in range(0, total, PAGE_SIZE)
+        ))
+        return [record for page in pages for record in page]
+
+    async def fetch_ids(self, fetcher, total):
+        pages = await asyncio.gather(*(
+            fetcher.get_json(self.query_url(select=":id", order=":id", limit=ID_PAGE_SIZE, offset=offset))
+            for offset in range(0, total, ID_PAGE_SIZE)
+        ))
+        return [record[":id"] for page in pages for record in page]
+
+    async def sync(self, fetcher, total):
+        """Bring the store up to date with a dataset of ``total`` rows.
+
+        Returns the ``added``, ``updated`` and ``removed`` row ids, the
+        ``systems`` (buckets) whose hash changed, the new Merkle ``root``
+        and ``watermark``, whether this was a ``full_sync``, and the
+        bucket field ``warning``, if any.
+        """
+        watermark = await asyncio.to_thread(self.store.watermark)
+        if watermark:
+            at = soql_timestamp(watermark)
+            (_, _, changed), (_, _, tied) = await asyncio.gather(
+                self.count(fetcher, f":updated_at > '{at}'"),
+                self.count(fetcher, f":updated_at = '{at}'"),
+            )
+            records = await self.fetch_rows(fetcher, changed, f":updated_at > '{at}'")
+            # Stored rows still at the watermark that the dataset does not
+            # have there were deleted; more there means one arrived late.
+            if tied > await asyncio.to_thread(self.store.count_at, watermark, records):
+                records += await self.fetch_rows(fetcher, tied, f":updated_at = '{at}'")
+        else:
+            records = await self.fetch_rows(fetcher, total)
+        warning = self.store.bucket_field_warning(records)
+        live_ids = None
+        if await asyncio.to_thread(self.store.count_after, records) != total:
+            live_ids = await self.fetch_ids(fetcher, total)
+        apply = asyncio.ensure_future(asyncio.to_thread(self.store.apply, records, live_ids))
+        try:
+            result = await asyncio.shield(apply)
+        except asyncio.CancelledError:
+            # The source's budget ran out while the store was committing.
+            # The commit lands regardless, so finish and report it rather
+            # than leave the store ahead of the state file.
+            result = await apply
+        old, tree = result.pop("old"), result.pop("tree")
+        result["systems"] = [
+            {"id": bucket, "change": system_change(old, tree, bucket)} for bucket in tree.diff(old)
+        ]
+        result.update(
+            fetched=len(records),
+            root=tree.root,
+            full_sync=watermark is None,
+            warning=warning,
+        )
+        return result
+
+
+def system_change(old, tree, bucket):
+    if bucket not in old.buckets:
+        return "added"
+    if bucket not in tree.buckets:
+        return "removed"
+    return "changed"
+
+
+def store_path(dataset_id, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{dataset_id}.sqlite")
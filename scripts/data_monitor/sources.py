@@ -0,0 +1,232 @@
+"""The data sources the monitor watches and how each one is checked.
+
+A source has a ``key`` (its entry in the state file), a display ``name``,
+a ``url`` and a time ``budget`` in seconds. ``check()`` returns the
+state entry for this run and ``changes()`` compares it with the previous
+one. Adding an agency page or dataset is one more entry in ``SOURCES``.
+
+State entries keep the ``ETag`` and ``Last-Modified`` of the response
+they were built from. The next run sends them back as ``If-None-Match``
+and ``If-Modified-Since``; a 304 reuses the previous entry without
+downloading or parsing a body.
+"""
+
+import asyncio
+import hashlib
+from http import HTTPStatus
+
+from bs4 import BeautifulSoup
+
+from .socrata import RecordStore, SocrataSync, store_path
+from .state import STORE_DIR, data_fields
+
+DATA_FILE_EXTENSIONS = [".csv", ".xlsx", ".xls", ".zip", ".pdf"]
+
+
+def get_content_hash(content):
+    """Generate MD5 hash of content."""
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+class Source:
+    budget = 30.0
+
+    def __init__(self, key, name, url, budget=None):
+        self.key = key
+        self.name = name
+        self.url = url
+        if budget is not None:
+            self.budget = budget
+
+    async def check(self, fetcher, previous):
+        raise NotImplementedError
+
+    def conditional_headers(self, previous):
+        """Revalidation headers for the last good data in ``previous``, if any."""
+        if not previous.get("content_hash"):
+            return {}
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+        return headers
+
+    def not_modified(self, previous):
+        """The result for a 304: the previous run's data, unchanged."""
+        return {"success": True, **data_fields(previous), "not_modified": True, "url": self.url}
+
+    def changes(self, previous, current):
+        """Return change dicts for the issue body; empty if nothing changed."""
+        if previous.get("content_hash") and previous["content_hash"] != current["content_hash"]:
+            return [self.change("Data content changed", "Record content has been modified")]
+        return []
+
+    def change(self, change_type, details):
+        return {"source": self.name, "type": change_type, "details": details, "url": self.url}
+
+
+def validators(headers):
+    """The ``ETag`` and ``Last-Modified`` of a response, as state entry fields."""
+    fields = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+    return {key: value for key, value in fields.items() if value}
+
+
+class SocrataDataset(Source):
+    """A Socrata dataset, synced row by row into a local SQLite store.
+
+    The full-dataset count query is sent conditionally: Socrata's query
+    ``ETag`` follows the dataset's data version, so a 304 means nothing
+    changed and the sync is skipped. Otherwise only rows changed since
+    the store's ``:updated_at`` watermark are transferred (see
+    ``socrata.py``). ``content_hash`` is the root of a Merkle tree over
+    every stored row, bucketed by ``bucket_field``. Any edit anywhere in
+    the dataset is detected, and the changed buckets are listed as
+    ``systems`` in the change. If the rows have no ``bucket_field``, the
+    change covers the whole dataset and the entry carries a ``warning``.
+    """
+
+    budget = 120.0
+
+    def __init__(
+        self, key, name, domain, dataset_id, page_url, budget=None, store_dir=STORE_DIR, bucket_field="pwsid"
+    ):
+        super().__init__(key, name, page_url, budget)
+        self.resource_url = f"https://{domain}/resource/{dataset_id}.json"
+        # Bumped with the bucket hash; see ``changes``.
+        self.hash_scheme = f"merkle-content:{bucket_field}"
+        store = RecordStore(store_path(dataset_id, store_dir), bucket_field)
+        self.sync = SocrataSync(self.resource_url, store)
+
+    async def check(self, fetcher, previous):
+        status, headers, total = await self.sync.count(fetcher, headers=self.conditional_headers(previous))
+        if status == HTTPStatus.NOT_MODIFIED:
+            return self.not_modified(previous)
+        delta = await self.sync.sync(fetcher, total)
+        result = {
+            "success": True,
+            "record_count": total,
+            "content_hash": delta["root"],
+            "hash_scheme": self.hash_scheme,
+            "watermark": delta["watermark"],
+            "full_sync": delta["full_sync"],
+            "records_fetched": delta["fetched"],
+            "records_added": len(delta["added"]),
+            "records_updated": len(delta["updated"]),
+            "records_removed": len(delta["removed"]),
+            # A full sync has no previous tree to diff against, and
+            # without the bucket field there is only one bucket.
+            "systems": [] if delta["full_sync"] or delta["warning"] else delta["systems"],
+            **validators(headers),
+            "url": self.url,
+        }
+        if delta["warning"]:
+            result["warning"] = delta["warning"]
+        return result
+
+    def changes(self, previous, current):
+        if current.get("not_modified"):
+            return []
+        if previous.get("record_count") and previous["record_count"] != current["record_count"]:
+            change = self.change(
+                "Record count changed",
+                f"Previous: {previous['record_count']}, Current: {current['record_count']}"
+                + delta_summary(current, ", "),
+            )
+        # Hashes from an older scheme (a 100-record sample, a flat hash of
+        # all rows, then a Merkle root over row ids) are not comparable.
+        elif (
+            previous.get("hash_scheme") == self.hash_scheme
+            and previous["content_hash"] != current["content_hash"]
+        ):
+            change = self.change(
+                "Data content changed", "Record content has been modified" + delta_summary(current, ": ")
+            )
+        else:
+            return []
+        if current["systems"]:
+            change["systems"] = current["systems"]
+        return [change]
+
+
+def delta_summary(result, separator):
+    """The added/updated/removed counts of an incremental sync, for change details."""
+    if result.get("full_sync"):
+        return ""
+    summary = (
+        f"{separator}{result['records_added']} added, {result['records_updated']} updated, "
+        f"{result['records_removed']} removed"
+    )
+    if result["systems"]:
+        summary += f" across {len(result['systems'])} system(s)"
+    return summary
+
+
+def parse_page(html):
+    """Return the hash of a page's main text and its number of data file links."""
+    soup = BeautifulSoup(html, "html.parser")
+    # Remove script, style, and other dynamic elements
+    for element in soup(["script", "style", "nav", "footer", "header"]):
+        element.decompose()
+    text_content = soup.get_text(separator=" ", strip=True)
+    data_links = [
+        link["href"] for link in soup.find_all("a", href=True)
+        if any(ext in link["href"].lower() for ext in DATA_FILE_EXTENSIONS)
+    ]
+    return get_content_hash(text_content), len(data_links)
+
+
+class WebPage(Source):
+    """An agency web page, checked by a hash of its text content."""
+
+    def __init__(self, key, name, url, description, budget=None):
+        super().__init__(key, name, url, budget)
+        self.description = description
+
+    async def check(self, fetcher, previous):
+        status, headers, body = await fetcher.get(self.url, self.conditional_headers(previous))
+        if status == HTTPStatus.NOT_MODIFIED:
+            return self.not_modified(previous)
+        html = body.decode("utf-8", errors="replace")
+        # Parsing is CPU-bound; keep the event loop free for the other sources.
+        content_hash, links = await asyncio.to_thread(parse_page, html)
+        return {
+            "success": True,
+            "content_hash": content_hash,
+            "data_links_count": links,
+            **validators(headers),
+            "url": self.url,
+        }
+
+    def changes(self, previous, current):
+        if previous.get("content_hash") and previous["content_hash"] != current["content_hash"]:
+            return [self.change("Page content changed", self.description)]
+        return []
+
+
+LCR_URL = (
+    "https://www.michigan.gov/egle/about/organization/drinking-water-and-environmental-health/"
+    "community-water-supply/lead-and-copper-rule"
+)
+
+SOURCES = [
+    SocrataDataset(
+        "socrata_api",
+        "90th Percentile API (Socrata)",
+        "data.michigan.gov",
+        "39ya-9txc",
+        "https://data.michigan.gov/dataset/Public-Water-Supply-90th-Percentiles/39ya-9txc",
+    ),
+    WebPage(
+        "dsmi_page",
+        "EGLE DSMI Inventories Page",
+        f"{LCR_URL}/dsmi-inventories",
+        "The DSMI inventories page has been updated - new data may be available",
+    ),
+    WebPage(
+        "lcr_page",
+        "EGLE Lead & Copper Rule Page",
+        LCR_URL,
+        "The Lead & Copper Rule page has been updated",
+    ),
+]
@@ -0,0 +1,38 @@
+"""Load and save the monitor's state file (``.data-check-state.json``)."""
+
+import json
+
+# File to store previous state, relative to the repository root.
+STATE_FILE = ".data-check-state.json"
+# Directory for local dataset stores (not committed; cached between runs).
+STORE_DIR = ".data-monitor"
+
+# Entry fields describing one run rather than the source's data. A failed
+# run keeps the other fields from the last good run, so the next success
+# is still compared against real data.
+RUN_FIELDS = {
+    "success", "error", "failure", "status", "attempts", "consecutive_failures", "not_modified",
+    "elapsed", "url",
+    "full_sync", "records_fetched", "records_added", "records_updated", "records_removed",
+    "systems",
+}
+
+
+def data_fields(entry):
+    """The fields of a state entry that describe the source's data."""
+    return {key: value for key, value in entry.items() if key not in RUN_FIELDS}
+
+
+def load_state(path=STATE_FILE):
+    """Load previous check state from file."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    """Save current state to file."""
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
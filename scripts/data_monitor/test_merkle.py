@@ -0,0 +1,111 @@
+"""The incrementally maintained Merkle tree matches a full rebuild."""
+
+import random
+
+from data_monitor.merkle import MerkleTree
+from data_monitor.socrata import RecordStore
+
+
+def bucket_hashes(count, seed=0):
+    rng = random.Random(seed)
+    return {f"MI{i:07d}": f"{rng.getrandbits(64):016x}" for i in range(count)}
+
+
+def test_incremental_update_matches_rebuild():
+    buckets = bucket_hashes(900)
+    tree = MerkleTree()
+    tree.update(buckets)
+    old = tree.copy()
+
+    changes = {"MI0000005": "edited", "MI0000010": None, "MI0009999": "new"}
+    tree.update(changes)
+    expected = {**buckets, **{b: h for b, h in changes.items() if h is not None}}
+    del expected["MI0000010"]
+    rebuilt = MerkleTree()
+    rebuilt.update(expected)
+
+    assert tree.nodes == rebuilt.nodes
+    assert tree.root == rebuilt.root != old.root
+    assert tree.diff(old) == sorted(changes)
+    assert old.diff(old.copy()) == []
+
+
+def test_tree_ignores_insertion_order():
+    buckets = bucket_hashes(300, seed=1)
+    forward, backward = MerkleTree(), MerkleTree()
+    forward.update(buckets)
+    for bucket in reversed(list(buckets)):
+        backward.update({bucket: buckets[bucket]})
+    assert forward.nodes == backward.nodes
+
+
+def test_removing_every_bucket_empties_the_tree():
+    buckets = bucket_hashes(50, seed=2)
+    tree = MerkleTree()
+    tree.update(buckets)
+    tree.update({bucket: None for bucket in buckets})
+    assert tree.nodes == {} and tree.root == MerkleTree().root
+
+
+def record(row_id, pwsid, value, updated_at="2026-10-01T00:00:00.000Z"):
+    return {":id": row_id, ":updated_at": updated_at, "pwsid": pwsid, "value": value}
+
+
+def test_store_tree_matches_rebuild(tmp_path):
+    rows = [record(f"row-{i:04d}", f"MI{i % 40:07d}", str(i % 7)) for i in range(400)]
+    store = RecordStore(str(tmp_path / "incremental.sqlite"), "pwsid")
+    store.apply(rows)
+
+    later = "2026-10-02T00:00:00.000Z"
+    delta = [
+        record("row-0005", "MI0000005", "edited", later),
+        record("row-0006", "MI0000099", "6", later),  # moved to a new system
+        record("row-0007", "MI0000007", "0", later),  # touched, not edited
+        record("row-9999", "MI0000001", "new", later),
+    ]
+    live_ids = [row[":id"] for row in rows if row[":id"] != "row-0010"] + ["row-9999"]
+    result = store.apply(delta, live_ids)
+
+    assert result["added"] == ["row-9999"]
+    assert result["updated"] == ["row-0005", "row-0006"]
+    assert result["removed"] == ["row-0010"]
+    assert result["tree"].diff(result["old"]) == [
+        "MI0000001", "MI0000005", "MI0000006", "MI0000010", "MI0000099",
+    ]
+
+    current = {row[":id"]: row for row in rows}
+    current.update({row[":id"]: row for row in delta})
+    del current["row-0010"]
+    rebuilt = RecordStore(str(tmp_path / "rebuilt.sqlite"), "pwsid")
+    assert rebuilt.apply(list(current.values()))["tree"].root == result["tree"].root
+    assert store.watermark() == later
+
+
+def test_rekeyed_rows_keep_the_root(tmp_path):
+    rows = [record(f"row-{i:04d}", f"MI{i % 40:07d}", str(i % 7)) for i in range(400)]
+    store = RecordStore(str(tmp_path / "store.sqlite"), "pwsid")
+    before = store.apply(rows)["tree"]
+
+    # A dataset replace: the same rows under new ids and timestamps.
+    later = "2026-10-02T00:00:00.000Z"
+    rekeyed = [
+        {**row, ":id": f"new-{i:04d}", ":updated_at": later} for i, row in enumerate(reversed(rows))
+    ]
+    result = store.apply(rekeyed, [row[":id"] for row in rekeyed])
+
+    assert len(result["added"]) == len(result["removed"]) == 400
+    assert result["tree"].root == before.root
+    assert result["tree"].diff(result["old"]) == []
+
+
+def test_missing_bucket_field_falls_back_to_one_bucket(tmp_path):
+    store = RecordStore(str(tmp_path / "store.sqlite"), "wssn")
+    rows = [record("row-0001", "MI0000001", "1"), record("row-0002", "MI0000002", "2")]
+    warning = store.bucket_field_warning(rows)
+    assert "'wssn'" in warning and "pwsid, value" in warning
+    assert store.bucket_field_warning([]) is None
+
+    result = store.apply(rows)
+    assert list(result["tree"].buckets) == [""]
+    edited = store.apply([record("row-0002", "MI0000002", "edited", "2026-10-02T00:00:00.000Z")])
+    assert edited["tree"].root != result["tree"].root
@@ -0,0 +1,144 @@
+"""Retries, failure classes, timeouts and host limits against a local test server."""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from data_monitor import session
+from data_monitor.engine import run_source
+from data_monitor.session import Fetcher, FetchError, open_session
+from data_monitor.sources import WebPage
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(session, "BACKOFF_BASE", 0.0)
+    monkeypatch.setattr(session, "REQUEST_TIMEOUT", aiohttp.ClientTimeout(sock_read=0.2))
+
+
+def make_app(hits):
+    """Routes that count their hits in ``hits``."""
+
+    async def forbidden(request):
+        hits["forbidden"] = hits.get("forbidden", 0) + 1
+        return web.Response(status=403)
+
+    async def flaky(request):
+        hits["flaky"] = hits.get("flaky", 0) + 1
+        if hits["flaky"] < 3:
+            return web.Response(status=503)
+        return web.Response(text="ok")
+
+    async def missing(request):
+        hits["missing"] = hits.get("missing", 0) + 1
+        return web.Response(status=404)
+
+    async def slow(request):
+        hits["slow"] = hits.get("slow", 0) + 1
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    async def busy(request):
+        hits["in_flight"] = hits.get("in_flight", 0) + 1
+        hits["max_in_flight"] = max(hits.get("max_in_flight", 0), hits["in_flight"])
+        await asyncio.sleep(0.05)
+        hits["in_flight"] -= 1
+        return web.Response(text="ok")
+
+    app = web.Application()
+    for name, handler in [
+        ("forbidden", forbidden), ("flaky", flaky), ("missing", missing), ("slow", slow), ("busy", busy),
+    ]:
+        app.router.add_get(f"/{name}", handler)
+    return app
+
+
+def serve(check, host_limits=None):
+    """Run ``check(fetcher, url_of, hits)`` against a fresh test server."""
+
+    async def run():
+        hits = {}
+        server = TestServer(make_app(hits))
+        await server.start_server()
+        try:
+            async with open_session(host_limits) as http:
+                fetcher = Fetcher(http, host_limits)
+                result = await check(fetcher, lambda path: str(server.make_url(path)))
+        finally:
+            await server.close()
+        return result, hits
+
+    return asyncio.run(run())
+
+
+def test_forbidden_after_max_attempts():
+    async def check(fetcher, url_of):
+        with pytest.raises(FetchError) as error:
+            await fetcher.get(url_of("/forbidden"))
+        return error.value
+
+    error, hits = serve(check)
+    assert (error.failure, error.status, error.attempts) == ("forbidden", 403, 3)
+    assert hits["forbidden"] == 3
+
+
+def test_transient_server_error_is_retried():
+    async def check(fetcher, url_of):
+        return await fetcher.get_text(url_of("/flaky"))
+
+    text, hits = serve(check)
+    assert text == "ok" and hits["flaky"] == 3
+
+
+def test_not_found_is_not_retried():
+    async def check(fetcher, url_of):
+        with pytest.raises(FetchError) as error:
+            await fetcher.get(url_of("/missing"))
+        return error.value
+
+    error, hits = serve(check)
+    assert (error.failure, error.attempts) == ("not_found", 1)
+    assert hits["missing"] == 1
+
+
+def test_request_timeout():
+    async def check(fetcher, url_of):
+        with pytest.raises(FetchError) as error:
+            await fetcher.get(url_of("/slow"))
+        return error.value
+
+    error, hits = serve(check)
+    assert (error.failure, error.attempts) == ("timeout", 3)
+    assert hits["slow"] == 3
+
+
+def test_budget_timeout_keeps_last_good_data():
+    previous = {"success": False, "content_hash": "abc", "failure": "forbidden", "consecutive_failures": 1}
+
+    async def check(fetcher, url_of):
+        page = WebPage("page", "Page", url_of("/slow"), "changed", budget=0.1)
+        return await run_source(page, fetcher, previous)
+
+    result, _ = serve(check)
+    assert result["success"] is False and result["failure"] == "timeout"
+    assert result["content_hash"] == "abc" and result["consecutive_failures"] == 2
+
+
+def test_source_failure_is_classified():
+    async def check(fetcher, url_of):
+        return await run_source(WebPage("page", "Page", url_of("/forbidden"), "changed"), fetcher, {})
+
+    result, _ = serve(check)
+    assert (result["failure"], result["status"], result["attempts"]) == ("forbidden", 403, 3)
+    assert result["consecutive_failures"] == 1
+
+
+def test_host_limiter_caps_concurrency():
+    async def check(fetcher, url_of):
+        await asyncio.gather(*(fetcher.get(url_of("/busy")) for _ in range(8)))
+
+    _, hits = serve(check, host_limits={"127.0.0.1": (2, 0.0)})
+    assert hits["max_in_flight"] == 2
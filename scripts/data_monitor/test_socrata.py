@@ -0,0 +1,116 @@
+"""Incremental Socrata syncs against a local test server."""
+
+import asyncio
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from data_monitor.session import Fetcher, open_session
+from data_monitor.socrata import RecordStore, SocrataSync
+
+T0 = "2026-10-01T00:00:00.000Z"
+T1 = "2026-10-02T00:00:00.000Z"
+
+
+def record(row_id, pwsid, value, updated_at=T0):
+    return {":id": row_id, ":updated_at": updated_at, "pwsid": pwsid, "value": value}
+
+
+def matches(where, updated_at):
+    """Evaluate the ``:updated_at`` comparisons the sync sends."""
+    if not where:
+        return True
+    _, op, value = where.split(" ", 2)
+    value, updated_at = value.strip("'"), updated_at.rstrip("Z")
+    return {">": updated_at > value, ">=": updated_at >= value, "=": updated_at == value}[op]
+
+
+def socrata_app(rows, requests):
+    async def resource(request):
+        query = request.query
+        requests.append(dict(query))
+        data = sorted(
+            (row for row in rows.values() if matches(query.get("$where"), row[":updated_at"])),
+            key=lambda row: row[":id"],
+        )
+        if query.get("$select") == "count(*)":
+            return web.json_response([{"count": str(len(data))}])
+        offset, limit = int(query.get("$offset", 0)), int(query.get("$limit", 1000))
+        data = data[offset:offset + limit]
+        if query.get("$select") == ":id":
+            data = [{":id": row[":id"]} for row in data]
+        return web.json_response(data)
+
+    app = web.Application()
+    app.router.add_get("/resource/test.json", resource)
+    return app
+
+
+async def run_sync(rows, store, requests=None, budget=None):
+    server = TestServer(socrata_app(rows, [] if requests is None else requests))
+    await server.start_server()
+    try:
+        async with open_session({}) as session:
+            sync = SocrataSync(str(server.make_url("/resource/test.json")), store)
+            check = sync.sync(Fetcher(session, {}), len(rows))
+            return await (asyncio.wait_for(check, budget) if budget else check)
+    finally:
+        await server.close()
+
+
+def rows_of(*records):
+    return {row[":id"]: row for row in records}
+
+
+def fetched_rows(requests):
+    return [query for query in requests if query.get("$select") == ":*, *"]
+
+
+def test_unchanged_dataset_refetches_nothing(tmp_path):
+    rows = rows_of(*(record(f"row-{i:04d}", f"MI{i % 20:07d}", str(i)) for i in range(50)))
+    store = RecordStore(str(tmp_path / "store.sqlite"), "pwsid")
+    assert asyncio.run(run_sync(rows, store))["full_sync"]
+
+    requests = []
+    result = asyncio.run(run_sync(rows, store, requests))
+    assert result["fetched"] == 0 and result["systems"] == []
+    assert fetched_rows(requests) == []
+
+
+def test_rows_after_and_at_the_watermark(tmp_path):
+    rows = rows_of(*(record(f"row-{i:04d}", f"MI{i % 20:07d}", str(i)) for i in range(50)))
+    store = RecordStore(str(tmp_path / "store.sqlite"), "pwsid")
+    asyncio.run(run_sync(rows, store))
+
+    rows.update(rows_of(record("row-0003", "MI0000003", "edited", T1)))
+    requests = []
+    result = asyncio.run(run_sync(rows, store, requests))
+    assert result["fetched"] == 1 and result["updated"] == ["row-0003"]
+    wheres = [query["$where"] for query in fetched_rows(requests)]
+    assert wheres == [":updated_at > '2026-10-01T00:00:00.000'"]
+
+    # A row stamped in the same instant as the watermark, after the last sync.
+    rows.update(rows_of(record("row-0100", "MI0000100", "late", T1)))
+    result = asyncio.run(run_sync(rows, store))
+    assert result["added"] == ["row-0100"]
+    assert result["systems"] == [{"id": "MI0000100", "change": "added"}]
+    assert store.watermark() == T1
+
+
+def test_budget_timeout_does_not_lose_a_commit(tmp_path, monkeypatch):
+    rows = rows_of(*(record(f"row-{i:04d}", f"MI{i % 20:07d}", str(i)) for i in range(50)))
+    store = RecordStore(str(tmp_path / "store.sqlite"), "pwsid")
+    asyncio.run(run_sync(rows, store))
+    rows.update(rows_of(record("row-0003", "MI0000003", "edited", T1)))
+
+    apply = store.apply
+
+    def slow_apply(*args):
+        time.sleep(0.5)
+        return apply(*args)
+
+    monkeypatch.setattr(store, "apply", slow_apply)
+    result = asyncio.run(run_sync(rows, store, budget=0.3))
+    assert result["updated"] == ["row-0003"]
+    assert result["watermark"] == store.watermark() == T1
@@ -0,0 +1,73 @@
+"""Conditional requests: a 304 reuses the previous entry without a body."""
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from data_monitor.engine import run_source
+from data_monitor.session import Fetcher, open_session
+from data_monitor.sources import WebPage
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Thu, 01 Oct 2026 00:00:00 GMT"
+
+
+def page_app(requests):
+    async def page(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304)
+        html = '<main>Inventories <a href="inventory.xlsx">2026</a></main>'
+        return web.Response(
+            text=html, content_type="text/html", headers={"ETag": ETAG, "Last-Modified": LAST_MODIFIED}
+        )
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    return app
+
+
+def check_page(previous, requests):
+    async def run():
+        server = TestServer(page_app(requests))
+        await server.start_server()
+        try:
+            async with open_session({}) as session:
+                page = WebPage("page", "Page", str(server.make_url("/page")), "changed")
+                return page, await run_source(page, Fetcher(session, {}), previous)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_not_modified_reuses_previous_entry():
+    requests = []
+    _, first = check_page({}, requests)
+    assert first["success"] and first["etag"] == ETAG and first["last_modified"] == LAST_MODIFIED
+    assert "If-None-Match" not in requests[0]
+
+    page, second = check_page(first, requests)
+    assert requests[1]["If-None-Match"] == ETAG
+    assert requests[1]["If-Modified-Since"] == LAST_MODIFIED
+    assert second["success"] and second["not_modified"]
+    assert second["content_hash"] == first["content_hash"]
+    assert second["data_links_count"] == 1
+    assert page.changes(first, second) == []
+
+
+def test_not_modified_after_a_failure_is_a_success():
+    _, first = check_page({}, [])
+    failed = {**first, "success": False, "failure": "timeout", "error": "late", "consecutive_failures": 2}
+
+    _, result = check_page(failed, [])
+    assert result["success"] and result["not_modified"]
+    assert "failure" not in result and "consecutive_failures" not in result
+    assert result["content_hash"] == first["content_hash"]
+
+
+def test_no_validators_without_last_good_data():
+    requests = []
+    check_page({"success": False, "etag": ETAG}, requests)
+    assert "If-None-Match" not in requests[0]